@@ -0,0 +1,387 @@
+""" Contains local stand-in for a MediaWiki site, used by the benchmarks """
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+
+WORDS = [
+    "geralt", "rivia", "witcher", "school", "wolf", "cat", "griffin", "viper", "ciri", "yennefer",
+    "vengerberg", "triss", "merigold", "dandelion", "kaer", "morhen", "novigrad", "oxenfurt",
+    "velen", "skellige", "toussaint", "nilfgaard", "temeria", "redania", "kaedwen", "aedirn",
+    "sword", "silver", "steel", "potion", "decoction", "bomb", "sign", "igni", "aard", "quen",
+    "yrden", "axii", "monster", "drowner", "nekker", "ghoul", "griffin", "wyvern", "leshen",
+    "contract", "quest", "armor", "gear", "recipe", "diagram", "book", "chapter", "character",
+    "location", "map", "list", "history", "lore", "season", "episode", "game", "card", "gwent"
+]
+
+# Namespace id, name and whether it's a content namespace
+DEFAULT_NAMESPACES: List[Tuple[int, str, bool]] = [
+    (0, "", True), (1, "Talk", False), (2, "User", False), (4, "Project", False),
+    (14, "Category", False)
+]
+
+LANDING_PAGE = """<!DOCTYPE html>
+<html class="client-nojs" lang="en" dir="ltr">
+<head>
+<meta charset="UTF-8"/>
+<title>{name}</title>
+<meta name="generator" content="MediaWiki 1.39.0"/>
+<link rel="EditURI" type="application/rsd+xml" href="{api}?action=rsd"/>
+</head>
+<body class="mediawiki ltr sitedir-ltr">
+{padding}
+<a href="/wiki/Special:WhatLinksHere/Main_Page">What links here</a>
+</body>
+</html>
+"""
+
+
+# pylint: disable=too-many-instance-attributes
+class FakeMediaWiki:
+    """
+    Serves a generated wiki on a local port. Implements the parts of the MediaWiki API used by
+    the extension, with configurable latency, number of pages, namespaces and error rate
+    """
+
+    name: str
+    requests: int
+    bytes_sent: int
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, name: str, pages: int = 2000, latency: float = 0.05,
+                 jitter: float = 0.0, error_rate: float = 0.0, api_path: str = "/w/",
+                 namespaces: List[Tuple[int, str, bool]] | None = None,
+                 categories_per_page: int = 5, landing_page_size: int = 0, seed: int = 0) -> None:
+        """
+        :param name: Name of the site
+        :param pages: Number of pages to generate
+        :param latency: Time (in seconds) each response is delayed by
+        :param jitter: Maximum random time (in seconds) added to the latency
+        :param error_rate: Fraction of API requests answered with an HTTP 503 error
+        :param api_path: Path where the api.php script is located
+        :param namespaces: Namespace ids, names and whether they are content namespaces
+        :param categories_per_page: Number of categories returned for every page
+        :param landing_page_size: Number of bytes of filler content in the landing page
+        :param seed: Seed for the generated pages, latency jitter and errors
+        """
+
+        self.name = name
+        self.requests = 0
+        self.bytes_sent = 0
+
+        self._latency = latency
+        self._jitter = jitter
+        self._error_rate = error_rate
+        self._api_path = api_path
+        self._namespaces = namespaces or DEFAULT_NAMESPACES
+        self._categories_per_page = categories_per_page
+        self._landing_page_size = landing_page_size
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._pages = self._generate_pages(pages, random.Random(seed))
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        """
+        Returns URL of the site, as it would be entered by the user
+        :return: URL of the landing page
+        """
+
+        if not self._server:
+            raise RuntimeError("Server is not running")
+
+        return f"http://127.0.0.1:{self._server.server_port}/"
+
+    def start(self) -> FakeMediaWiki:
+        """
+        Starts serving the site in a background thread
+        :return: This site
+        """
+
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """ Forwards requests to the site """
+            protocol_version = "HTTP/1.1"
+
+            # noinspection PyPep8Naming
+            # pylint: disable=invalid-name
+            def do_GET(self) -> None:
+                """ Handles GET requests """
+                wiki.handle(self)
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """ Stops the server """
+
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_counters(self) -> None:
+        """ Resets number of handled requests and sent bytes """
+
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+
+    def _generate_pages(self, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+        """
+        Generates pages with titles made of random words
+        :param count: Number of pages
+        :param rng: Random number generator
+        :return: List of pages
+        """
+
+        content_namespaces = [namespace for namespace in self._namespaces if namespace[2]]
+        titles = set()
+        pages: List[Dict[str, Any]] = []
+
+        while len(pages) < count:
+            namespace_id, namespace_name, _ = rng.choice(content_namespaces)
+            title = " ".join(rng.sample(WORDS, rng.randint(1, 3))).capitalize()
+            if namespace_name:
+                title = f"{namespace_name}:{title}"
+            if title in titles:
+                title = f"{title} ({len(pages)})"
+
+            titles.add(title)
+            pages.append({
+                "pageid": len(pages) + 1,
+                "ns": namespace_id,
+                "title": title,
+                "categories": [
+                    {"ns": 14, "title": f"Category:{word.capitalize()}"}
+                    for word in rng.sample(WORDS, min(self._categories_per_page, len(WORDS)))
+                ]
+            })
+
+        return pages
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        """
+        Responds to the request
+        :param request: Request to respond to
+        """
+
+        url = urlparse(request.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        with self._lock:
+            delay = self._latency + self._random.random() * self._jitter
+            failed = self._random.random() < self._error_rate
+            self.requests += 1
+
+        time.sleep(delay)
+
+        if url.path == self._api_path + "api.php":
+            if failed:
+                self._send(request, 503, "text/plain", b"Service Unavailable")
+                return
+
+            self._send(request, 200, "application/json; charset=utf-8",
+                       json.dumps(self._api(request, params)).encode())
+        elif url.path in ("/", "/wiki/Main_Page"):
+            html = LANDING_PAGE.format(name=self.name, api=self._api_path + "api.php",
+                                       padding="x" * self._landing_page_size)
+            self._send(request, 200, "text/html; charset=utf-8", html.encode())
+        else:
+            self._send(request, 404, "text/html; charset=utf-8", b"<html>Not Found</html>")
+
+    def _send(self, request: BaseHTTPRequestHandler, status: int, content_type: str,
+              body: bytes) -> None:
+        """
+        Writes the response, compressed if the client accepts gzip
+        :param request: Request to respond to
+        :param status: HTTP status code
+        :param content_type: Content type of the body
+        :param body: Response body
+        """
+
+        gzipped = "gzip" in (request.headers.get("Accept-Encoding") or "")
+        if gzipped:
+            body = gzip.compress(body, compresslevel=1)
+
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            request.send_header("Content-Encoding", "gzip")
+        request.end_headers()
+
+        if request.command != "HEAD":
+            request.wfile.write(body)
+
+        with self._lock:
+            self.bytes_sent += len(body)
+
+    def _api(self, request: BaseHTTPRequestHandler, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Answers the API request
+        :param request: Request to respond to
+        :param params: Query parameters
+        :return: API response
+        """
+
+        if params.get("action") != "query":
+            return {"error": {"code": "badvalue", "info": "Unsupported action"}}
+
+        result: Dict[str, Any] = {"batchcomplete": ""}
+        query: Dict[str, Any] = {}
+        meta = params.get("meta", "").split("|")
+        server = f"http://{request.headers.get('Host')}"
+
+        if "curtimestamp" in params:
+            result["curtimestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        if "siteinfo" in meta:
+            query["general"] = {
+                "mainpage": "Main Page",
+                "sitename": self.name,
+                "generator": "MediaWiki 1.39.0",
+                "server": server,
+                "articlepath": "/wiki/$1",
+                "scriptpath": self._api_path.rstrip("/")
+            }
+            query["namespaces"] = {
+                str(namespace_id): {"id": namespace_id, "*": name, "canonical": name,
+                                    **({"content": ""} if content else {})}
+                for namespace_id, name, content in self._namespaces
+            }
+
+        if "userinfo" in meta:
+            query["userinfo"] = {"id": 0, "name": "127.0.0.1", "anon": ""}
+
+        generator = params.get("generator")
+        if generator in ("search", "prefixsearch"):
+            prefix = "gsr" if generator == "search" else "gps"
+            matches = self._find(params.get(prefix + "search", ""),
+                                 params.get(prefix + "namespace"),
+                                 int(params.get(prefix + "limit", 10)),
+                                 int(params.get(prefix + "offset", 0)),
+                                 generator == "prefixsearch")
+            query["pages"] = {
+                str(page["pageid"]): self._page(page, index, params, server)
+                for index, page in enumerate(matches, start=1)
+            }
+
+        if "pageids" in params:
+            page_ids = {int(value) for value in params["pageids"].split("|")}
+            query["pages"] = {
+                str(page["pageid"]): self._page(page, 0, params, server)
+                for page in self._pages if page["pageid"] in page_ids
+            }
+
+        if params.get("list") in ("search", "prefixsearch"):
+            prefix = "sr" if params["list"] == "search" else "ps"
+            matches = self._find(params.get(prefix + "search", ""),
+                                 params.get(prefix + "namespace"),
+                                 int(params.get(prefix + "limit", 10)),
+                                 int(params.get(prefix + "offset", 0)),
+                                 params["list"] == "prefixsearch")
+            query[params["list"]] = [
+                {"ns": page["ns"], "title": page["title"], "pageid": page["pageid"]}
+                for page in matches
+            ]
+
+        if params.get("list") == "allpages":
+            namespace_id = int(params.get("apnamespace", 0))
+            start = params.get("apcontinue", "")
+            limit = 500 if params.get("aplimit") in (None, "max") else int(params["aplimit"])
+            pages = sorted((page for page in self._pages
+                            if page["ns"] == namespace_id and page["title"] >= start),
+                           key=lambda page: page["title"])
+            query["allpages"] = [
+                {"pageid": page["pageid"], "ns": page["ns"], "title": page["title"]}
+                for page in pages[:limit]
+            ]
+            if len(pages) > limit:
+                result["continue"] = {"apcontinue": pages[limit]["title"], "continue": "-||"}
+
+        if params.get("list") == "recentchanges":
+            query["recentchanges"] = []
+
+        result["query"] = query
+        return result
+
+    # pylint: disable=too-many-arguments
+    def _find(self, text: str, namespaces: str | None, limit: int, offset: int, prefix: bool) -> \
+            List[Dict[str, Any]]:
+        """
+        Finds pages matching the text, the closest matches (the shortest titles) first,
+        like the relevance ranking of a real wiki
+        :param text: Text to search
+        :param namespaces: Namespace ids separated by "|", or None for all content namespaces
+        :param limit: Maximum number of pages
+        :param offset: Number of pages to skip
+        :param prefix: Whether titles should start with the text,
+        otherwise all words of the text need to be in the title
+        :return: List of pages
+        """
+
+        text = text.lower().strip()
+        namespace_ids = {int(value) for value in namespaces.split("|")} if namespaces else \
+            {namespace[0] for namespace in self._namespaces if namespace[2]}
+
+        matches = []
+        for page in self._pages:
+            if page["ns"] not in namespace_ids:
+                continue
+
+            title = page["title"].lower().split(":", 1)[-1]
+            if (title.startswith(text) if prefix else
+                    all(word in title for word in text.split())):
+                matches.append(page)
+
+        matches.sort(key=lambda page: len(page["title"]))
+        return matches[offset:offset + limit]
+
+    def _page(self, page: Dict[str, Any], index: int, params: Dict[str, str], server: str) -> \
+            Dict[str, Any]:
+        """
+        Formats the page as returned by a generator
+        :param page: Generated page
+        :param index: Position of the page in the generator results
+        :param params: Query parameters
+        :param server: Server part of the URL
+        :return: Page with the requested props
+        """
+
+        props = params.get("prop", "").split("|")
+        result = {"pageid": page["pageid"], "ns": page["ns"], "title": page["title"],
+                  "index": index}
+
+        if "info" in props:
+            result.update(
+                contentmodel="wikitext",
+                pagelanguage="en",
+                touched="2022-01-01T00:00:00Z",
+                lastrevid=page["pageid"] * 10,
+                length=1000,
+                displaytitle=page["title"],
+                fullurl=f"{server}/wiki/{quote(page['title'].replace(' ', '_'))}"
+            )
+
+        if "categories" in props:
+            listed = params.get("clcategories")
+            result["categories"] = [category for category in page["categories"]
+                                    if not listed or category["title"] in listed.split("|")]
+
+        return result
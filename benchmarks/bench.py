@@ -0,0 +1,325 @@
+""" Benchmarks the extension end to end against local MediaWiki stand-ins, fully offline """
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+# Keep the persistent caches of the benchmark away from the real ones
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="wiki-search-bench-")
+
+# pylint: disable=wrong-import-position
+from ulauncher.api.shared.event import KeywordQueryEvent, PreferencesEvent
+from ulauncher.search.Query import Query  # type: ignore
+
+from benchmarks.FakeMediaWiki import FakeMediaWiki
+from data import CACHE_DIR
+from events.KeywordQueryEventListener import KeywordQueryEventListener
+from events.PreferencesEventListener import PreferencesEventListener
+from main import WikiSearchExtension
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "manifest.json")
+
+DEFAULT_QUERIES = ["geralt of rivia", "witcher school", "kaer morhen", "silver sword",
+                   "nilfgaard", "potion recipe"]
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Calculates the percentile using the nearest-rank method
+    :param values: Measured values
+    :param percent: Percentile to calculate, between 0 and 100
+    :return: Value of the percentile or 0 if there are no values
+    """
+
+    if not values:
+        return 0
+
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))]
+
+
+def default_preferences() -> Dict[str, Any]:
+    """
+    Reads default preferences from the manifest, as Ulauncher would pass them
+    :return: Preferences by their ids
+    """
+
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as file:
+        manifest = json.load(file)
+
+    return {preference["id"]: preference.get("default_value", "")
+            for preference in manifest["preferences"]}
+
+
+def measure_import() -> float:
+    """
+    Measures the time it takes to import the extension in a fresh interpreter,
+    Ulauncher can't talk to the extension before that
+    :return: Import time (in seconds)
+    """
+
+    output = subprocess.run(
+        [sys.executable, "-c", "import time; start = time.perf_counter(); import main; "
+                               "print(time.perf_counter() - start)"],
+        cwd=os.path.dirname(MANIFEST_PATH), capture_output=True, check=True, text=True
+    ).stdout
+
+    return float(output.strip().splitlines()[-1])
+
+
+def start_extension(preferences: Dict[str, Any]) -> Tuple[WikiSearchExtension, Dict[str, float]]:
+    """
+    Starts the extension, as Ulauncher would after launching its process
+    :param preferences: Preferences passed in the initial preferences event
+    :return: Extension and the times (in milliseconds) it took to handle the preferences event,
+    until the first wiki could be searched and until all wikis were ready
+    """
+
+    # noinspection PyProtectedMember
+    # pylint: disable=protected-access
+    WikiSearchExtension._cache.clear()
+    WikiSearchExtension._candidates.clear()
+
+    extension = WikiSearchExtension()
+    # Progressive results would be sent to Ulauncher, which is not running
+    extension.send_action = lambda event, action: None  # type: ignore
+    # Background warm-up would send requests the benchmark doesn't count as the user's
+    extension._warmer.stop()
+
+    start = time.perf_counter()
+    PreferencesEventListener().on_event(PreferencesEvent(dict(preferences)), extension)
+    handled = time.perf_counter()
+    extension.wait_for_wikis(first=True)
+    first = time.perf_counter()
+    extension.wait_for_wikis()
+    ready = time.perf_counter()
+
+    return extension, {
+        "ms": (handled - start) * 1000,
+        "first_ms": (first - start) * 1000,
+        "ready_ms": (ready - start) * 1000
+    }
+
+
+def type_queries(extension: WikiSearchExtension, wikis: List[FakeMediaWiki],
+                 keyword: str, queries: List[str]) -> Dict[str, float]:
+    """
+    Types the queries one character at a time, sending a keyword event on every keystroke
+    :param extension: Extension to send the events to
+    :param wikis: Wikis used by the extension
+    :param keyword: Keyword of the extension
+    :param queries: Queries to type
+    :return: Latency percentiles (in milliseconds), requests and bytes per keystroke
+    and the fraction of keystrokes answered without any requests
+    """
+
+    listener = KeywordQueryEventListener()
+    latencies: List[float] = []
+    requests = 0
+    received = 0
+    hits = 0
+
+    for query in queries:
+        for length in range(1, len(query) + 1):
+            for wiki in wikis:
+                wiki.reset_counters()
+
+            start = time.perf_counter()
+            listener.on_event(KeywordQueryEvent(Query(f"{keyword} {query[:length]}")), extension)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            keystroke_requests = sum(wiki.requests for wiki in wikis)
+            requests += keystroke_requests
+            received += sum(wiki.bytes_sent for wiki in wikis)
+            hits += keystroke_requests == 0
+
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "requests_per_keystroke": requests / len(latencies),
+        "kb_per_keystroke": received / len(latencies) / 1024,
+        "cache_hit_rate": hits / len(latencies)
+    }
+
+
+def run_scenario(wiki_count: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Measures a cold start, typing with empty caches, a restart and typing with warm caches
+    :param wiki_count: Number of configured wikis
+    :param args: Command line arguments
+    :return: Measurements of the scenario
+    """
+
+    wikis = [
+        FakeMediaWiki(f"Wiki {index}", pages=args.pages, latency=args.latency,
+                      jitter=args.jitter, error_rate=args.error_rate,
+                      namespaces=args.namespaces, categories_per_page=args.categories,
+                      seed=index).start()
+        for index in range(wiki_count)
+    ]
+
+    try:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+        preferences = default_preferences()
+        preferences["wiki_urls"] = " | ".join(wiki.url for wiki in wikis)
+        preferences.update(args.preference)
+        keyword = preferences["global_keyword"]
+
+        extension, cold_startup = start_extension(preferences)
+        cold_requests = sum(wiki.requests for wiki in wikis)
+        cold = type_queries(extension, wikis, keyword, args.queries)
+
+        for wiki in wikis:
+            wiki.reset_counters()
+
+        extension, warm_startup = start_extension(preferences)
+        warm_requests = sum(wiki.requests for wiki in wikis)
+        warm = type_queries(extension, wikis, keyword, args.queries)
+    finally:
+        for wiki in wikis:
+            wiki.stop()
+
+    return {
+        "wikis": wiki_count,
+        "startup": {
+            "cold": {**cold_startup, "requests": cold_requests},
+            "warm": {**warm_startup, "requests": warm_requests}
+        },
+        "typing": {"cold": cold, "warm": warm}
+    }
+
+
+def print_results(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                  import_time: float) -> None:
+    """
+    Prints the measurements as a table
+    :param results: Measurements of all scenarios
+    :param baseline: Measurements to compare with, may be empty
+    :param import_time: Import time of the extension (in milliseconds)
+    """
+
+    print(f"Import: {import_time:.1f}ms")
+    print(f"{'wikis':>5} {'phase':>6} {'startup':>9} {'first':>9} {'ready':>9} {'requests':>8}")
+    for result in results:
+        for phase in ("cold", "warm"):
+            startup = result["startup"][phase]
+            print(f"{result['wikis']:>5} {phase:>6} {startup['ms']:>7.1f}ms "
+                  f"{startup['first_ms']:>7.1f}ms {startup['ready_ms']:>7.1f}ms "
+                  f"{startup['requests']:>8}")
+    print()
+
+    previous = {(result["wikis"], phase): result["typing"][phase]
+                for result in baseline for phase in ("cold", "warm")}
+
+    print(f"{'wikis':>5} {'caches':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'req/key':>8} {'KB/key':>8} {'hits':>6}")
+
+    for result in results:
+        for phase in ("cold", "warm"):
+            typing = result["typing"][phase]
+            print(f"{result['wikis']:>5} {phase:>6} "
+                  f"{typing['p50']:>6.1f}ms {typing['p95']:>6.1f}ms {typing['p99']:>6.1f}ms "
+                  f"{typing['requests_per_keystroke']:>8.2f} {typing['kb_per_keystroke']:>8.2f} "
+                  f"{typing['cache_hit_rate']:>6.0%}")
+
+            before = previous.get((result["wikis"], phase))
+            if before:
+                print(f"{'':>12} " + " ".join(
+                    f"{(typing[key] - before[key]) / (before[key] or 1):>+8.0%}"
+                    for key in ("p50", "p95", "p99", "requests_per_keystroke", "kb_per_keystroke")
+                ))
+
+
+def parse_preference(value: str) -> Tuple[str, str]:
+    """
+    Parses preference override passed on the command line
+    :param value: Preference in the "id=value" format
+    :return: Preference id and value
+    """
+
+    key, _, preference = value.partition("=")
+    return key, preference
+
+
+def parse_namespaces(value: str) -> List[Tuple[int, str, bool]]:
+    """
+    Parses namespace layout passed on the command line
+    :param value: Comma separated namespaces in the "id:name[:content]" format
+    :return: Namespace ids, names and whether they are content namespaces
+    """
+
+    namespaces = []
+    for namespace in value.split(","):
+        namespace_id, _, rest = namespace.partition(":")
+        name, _, content = rest.partition(":")
+        if not namespace_id.lstrip("-").isdigit() or content not in ("", "content"):
+            raise argparse.ArgumentTypeError(f"invalid namespace: {namespace}")
+        namespaces.append((int(namespace_id), name, content == "content"))
+
+    # The pages are generated in the content namespaces only
+    if not any(content for _, _, content in namespaces):
+        raise argparse.ArgumentTypeError("at least one content namespace is required")
+
+    return namespaces
+
+
+def main() -> None:
+    """ Runs the benchmarks """
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wikis", default="1,5,20,50",
+                        help="comma separated numbers of wikis to benchmark with")
+    parser.add_argument("--pages", type=int, default=2000, help="pages per wiki")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="response latency of the wikis (in seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02,
+                        help="maximum random latency added to each response (in seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of API requests failing with HTTP 503")
+    parser.add_argument("--categories", type=int, default=5, help="categories per page")
+    parser.add_argument("--namespaces", type=parse_namespaces,
+                        metavar="ID:NAME[:content],...",
+                        help="comma separated namespaces of the wikis, the main namespace "
+                             "and a few talk and project ones if not specified")
+    parser.add_argument("--queries", type=lambda value: value.split(","), default=DEFAULT_QUERIES,
+                        help="comma separated queries to type")
+    parser.add_argument("--preference", type=parse_preference, action="append", default=[],
+                        metavar="ID=VALUE", help="overrides a preference, can be repeated")
+    parser.add_argument("--output", help="saves the results as JSON")
+    parser.add_argument("--compare", help="compares the results with previously saved JSON")
+    args = parser.parse_args()
+
+    baseline = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+
+    import_time = measure_import() * 1000
+
+    results = []
+    for wiki_count in map(int, args.wikis.split(",")):
+        print(f"Running with {wiki_count} wiki(s)...", file=sys.stderr)
+        results.append(run_scenario(wiki_count, args))
+
+    print_results(results, baseline, import_time)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"arguments": {key: value for key, value in vars(args).items()
+                                     if key not in ("output", "compare")},
+                       "import_ms": import_time, "results": results}, file, indent=2)
+
+    shutil.rmtree(os.environ["XDG_CACHE_HOME"], ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
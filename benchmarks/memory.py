@@ -0,0 +1,111 @@
+""" Benchmarks the memory used by cached search results, without any requests """
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from typing import Any, Callable, List
+
+from benchmarks.FakeMediaWiki import WORDS
+from benchmarks.processing import NAMESPACES, create_wiki
+from data.WikiPage import WikiPage
+from utils.API import API
+
+
+# noinspection PyShadowingBuiltins
+# pylint: disable=too-few-public-methods,redefined-builtin,too-many-arguments
+class LegacyWikiPage:
+    """ Page as it was stored before the pages became compact, kept as the baseline """
+
+    def __init__(self, wiki: API, id: int, title: str,
+                 display_title: str, namespace: str, url: str) -> None:
+        self.wiki = wiki
+        self.id = id
+        self.title = title
+        self.display_title = display_title
+        self.namespace = namespace
+        self.url = url
+
+
+def create_records(results: int, pages: int, seed: int = 0) -> List[str]:
+    """
+    Generates cached results in the format stored by the result cache
+    :param results: Number of results
+    :param pages: Number of pages in each result
+    :param seed: Seed of the random generator
+    :return: Serialized results
+    """
+
+    generator = random.Random(seed)
+    content = [namespace.name for namespace in NAMESPACES if namespace.has_content]
+    records = []
+
+    for _ in range(results):
+        result = []
+        for _ in range(pages):
+            title = " ".join(generator.choice(WORDS).capitalize()
+                             for _ in range(generator.randint(1, 3)))
+            result.append(["wiki.example.org", generator.randint(1, 100000), title, title,
+                           generator.choice(content),
+                           f"https://wiki.example.org/wiki/{title.replace(' ', '_')}"])
+        records.append(json.dumps(result))
+
+    return records
+
+
+def measure(load: Callable[[str], List[Any]], records: List[str]) -> int:
+    """
+    Measures memory kept by the loaded results
+    :param load: Function converting a serialized result into pages
+    :param records: Serialized results
+    :return: Number of bytes allocated by the results that are still alive
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+
+    results = [load(record) for record in records]
+
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    del results
+    return size
+
+
+def main() -> None:
+    """ Runs the benchmark """
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--results", type=int, default=1000, help="number of cached results")
+    parser.add_argument("--pages", type=int, default=8, help="pages per result")
+    args = parser.parse_args()
+
+    wiki = create_wiki()
+    records = create_records(args.results, args.pages)
+
+    before = measure(lambda record: [
+        LegacyWikiPage(wiki, page_id, title, display_title, namespace, url)
+        for _, page_id, title, display_title, namespace, url in json.loads(record)
+    ], records)
+
+    after = measure(lambda record: [
+        WikiPage(host, wiki.site["sitename"], wiki.wiki_id, page_id, title, display_title,
+                 namespace, url)
+        for host, page_id, title, display_title, namespace, url in json.loads(record)
+    ], records)
+
+    print(f"{args.results} results, {args.pages} pages each")
+    print(f"before: {before / args.results:.0f} bytes per result, "
+          f"{before / args.results / args.pages:.0f} bytes per page")
+    print(f"after:  {after / args.results:.0f} bytes per result, "
+          f"{after / args.results / args.pages:.0f} bytes per page ({1 - after / before:.0%} less)")
+    print("Legacy pages also kept their wikis alive after they were removed from the configuration")
+
+
+if __name__ == "__main__":
+    main()
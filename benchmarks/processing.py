@@ -0,0 +1,171 @@
+""" Benchmarks the conversion of raw search results into wiki pages, without any requests """
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import timeit
+from typing import cast, Any, Dict, List
+
+from benchmarks.FakeMediaWiki import WORDS
+from data import TITLE_READABILITY_IMPROVEMENTS
+from data.WikiNamespace import WikiNamespace
+from data.WikiPage import WikiPage
+from utils.API import API
+from utils.PageProcessor import PageProcessor
+
+NAMESPACES = [
+    WikiNamespace(0, "Main", True), WikiNamespace(1, "Talk", False),
+    WikiNamespace(4, "Project", False), WikiNamespace(14, "Category", False),
+    WikiNamespace(100, "Lore", True), WikiNamespace(102, "Quest", True),
+    WikiNamespace(104, "Gwent", True)
+]
+
+
+def create_wiki() -> API:
+    """
+    Creates a wiki from site info, as the endpoint cache does
+    :return: Initialized wiki
+    """
+
+    wiki = API(host="wiki.example.org", scheme="https", path="/w/", do_init=False)
+    wiki.load_site_info({
+        "mainpage": "Main Page",
+        "sitename": "Example Wiki",
+        "generator": "MediaWiki 1.39.0",
+        "server": "https://wiki.example.org",
+        "articlepath": "/wiki/$1"
+    }, NAMESPACES)
+
+    return wiki
+
+
+def create_raw_pages(count: int, categories: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generates pages in the format returned by the search generator with all props requested
+    :param count: Number of pages
+    :param categories: Number of categories of each page
+    :param seed: Seed of the random generator
+    :return: Raw pages
+    """
+
+    generator = random.Random(seed)
+    content = [namespace for namespace in NAMESPACES if namespace.has_content]
+    raw_pages = []
+
+    for index in range(count):
+        namespace = generator.choice(content)
+        title = "/".join(" ".join(generator.choice(WORDS).capitalize()
+                                  for _ in range(generator.randint(1, 3)))
+                         for _ in range(generator.randint(1, 2)))
+        title = title if namespace.id == 0 else f"{namespace.name}:{title}"
+
+        raw_page: Dict[str, Any] = {
+            "pageid": index + 1,
+            "ns": namespace.id,
+            "title": title,
+            "displaytitle": title,
+            "fullurl": f"https://wiki.example.org/wiki/{title.replace(' ', '_')}",
+            "index": index + 1,
+            "categories": [{"ns": 14, "title": f"Category:{generator.choice(WORDS).capitalize()}"}
+                           for _ in range(categories)]
+        }
+
+        if generator.random() < 0.05:
+            raw_page["categories"].append({"ns": 14, "title": "Category:Formatting subpages"})
+        if generator.random() < 0.05:
+            raw_page["langlinks"] = [{"lang": "en", "*": title}]
+
+        raw_pages.append(raw_page)
+
+    return raw_pages
+
+
+def legacy_process(wiki: API, raw_pages: List[Dict[str, Any]]) -> List[WikiPage]:
+    """
+    Converts raw pages the way the search did before the page processor was introduced,
+    kept as the baseline of the benchmark
+    :param wiki: Wiki the pages belong to
+    :param raw_pages: Raw pages
+    :return: List of pages
+    """
+
+    namespaces = list(filter(lambda value: value.has_content, wiki.namespaces.values()))
+    pages: List[WikiPage] = []
+
+    for raw_page in raw_pages:
+        title = cast(str, raw_page["title"])
+        display_title = cast(str, raw_page["displaytitle"])
+        namespace = next((namespace.name for namespace in namespaces
+                          if namespace.id == raw_page["ns"]), None)
+
+        if title == cast(str, wiki.site["mainpage"]):
+            continue
+
+        if len(raw_page["langlinks"] if "langlinks" in raw_page else []) > 0:
+            continue
+
+        formatting_category = next((category for category in (
+            cast(list, raw_page["categories"]) if "categories" in raw_page else []
+        ) if re.match(
+            r"(?:Category:)?Format(?:ting)?(?:\s+)?subpage(?:s)?",
+            category["title"]
+        )), None)
+
+        if formatting_category:
+            continue
+
+        for improvement in TITLE_READABILITY_IMPROVEMENTS:
+            display_title = improvement["regex"].sub(improvement["replacement"], display_title)
+
+            if namespace:
+                display_title = re.sub(rf"{namespace}:\s+", "", display_title)
+
+        pages.append(WikiPage(
+            host=wiki.host,
+            sitename=cast(str, wiki.site["sitename"]),
+            wiki_id=wiki.wiki_id,
+            id=cast(int, raw_page["pageid"]),
+            title=title,
+            display_title=display_title,
+            namespace=namespace or "Unknown",
+            url=cast(str, raw_page["fullurl"])
+        ))
+
+    return pages
+
+
+def main() -> None:
+    """ Runs the benchmark """
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=500,
+                        help="pages per result set, 500 is the maximum of gsrlimit")
+    parser.add_argument("--categories", type=int, default=5, help="categories per page")
+    parser.add_argument("--repeat", type=int, default=200, help="number of processed result sets")
+    args = parser.parse_args()
+
+    wiki = create_wiki()
+    raw_pages = create_raw_pages(args.pages, args.categories)
+
+    expected = [(page.id, page.display_title, page.namespace)
+                for page in legacy_process(wiki, raw_pages)]
+    actual = [(page.id, page.display_title, page.namespace)
+              for page in PageProcessor(wiki).process(raw_pages, True, True)]
+    assert expected == actual, "page processor returned different pages than the baseline"
+
+    def processor() -> List[WikiPage]:
+        # Prepared once per wiki, included in the measurement anyway
+        return PageProcessor(wiki).process(raw_pages, True, True)
+
+    before = min(timeit.repeat(lambda: legacy_process(wiki, raw_pages), number=args.repeat,
+                               repeat=5)) / args.repeat / args.pages
+    after = min(timeit.repeat(processor, number=args.repeat, repeat=5)) / args.repeat / args.pages
+
+    print(f"{args.pages} pages, {len(expected)} after filtering")
+    print(f"before: {before * 1e6:.2f}us per page")
+    print(f"after:  {after * 1e6:.2f}us per page ({before / after:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+""" Records typing of queries against real wikis, or replays it offline for profiling """
+from __future__ import annotations
+
+import argparse
+import cProfile
+import os
+import shutil
+import time
+from typing import List
+
+from ulauncher.api.shared.event import KeywordQueryEvent
+from ulauncher.search.Query import Query  # type: ignore
+
+from benchmarks.bench import DEFAULT_QUERIES, default_preferences, parse_preference, percentile, \
+    start_extension
+from data import TRAFFIC_RECORD_ENV, TRAFFIC_REPLAY_ENV, TRAFFIC_REPLAY_LATENCY_ENV
+from events.KeywordQueryEventListener import KeywordQueryEventListener
+
+
+def main() -> None:
+    """ Runs the session """
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("archive", help="path of the archive with the recorded traffic")
+    parser.add_argument("--record", action="store_true",
+                        help="sends the requests to the wikis and records the responses")
+    parser.add_argument("--wikis", required=True, help="wiki urls, as entered in the preferences")
+    parser.add_argument("--latency", type=float,
+                        help="latency of the replayed responses (in seconds), "
+                             "the recorded latency is used if not specified")
+    parser.add_argument("--queries", type=lambda value: value.split(","), default=DEFAULT_QUERIES,
+                        help="comma separated queries to type")
+    parser.add_argument("--preference", type=parse_preference, action="append", default=[],
+                        metavar="ID=VALUE", help="overrides a preference, can be repeated")
+    parser.add_argument("--profile", help="saves the cProfile statistics of the session")
+    args = parser.parse_args()
+
+    if args.record:
+        os.environ[TRAFFIC_RECORD_ENV] = args.archive
+    else:
+        os.environ[TRAFFIC_REPLAY_ENV] = args.archive
+        if args.latency is not None:
+            os.environ[TRAFFIC_REPLAY_LATENCY_ENV] = str(args.latency)
+
+    preferences = default_preferences()
+    preferences["wiki_urls"] = args.wikis
+    preferences.update(args.preference)
+    keyword = preferences["global_keyword"]
+
+    profiler = cProfile.Profile()
+    if args.profile:
+        profiler.enable()
+
+    extension, startup = start_extension(preferences)
+
+    listener = KeywordQueryEventListener()
+    latencies: List[float] = []
+    for query in args.queries:
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            listener.on_event(KeywordQueryEvent(Query(f"{keyword} {query[:length]}")), extension)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    if args.profile:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    print(f"startup: {startup['ms']:.1f}ms, first: {startup['first_ms']:.1f}ms, "
+          f"ready: {startup['ready_ms']:.1f}ms")
+    print(f"{len(latencies)} keystrokes: p50 {percentile(latencies, 50):.1f}ms, "
+          f"p95 {percentile(latencies, 95):.1f}ms, p99 {percentile(latencies, 99):.1f}ms")
+
+    shutil.rmtree(os.environ["XDG_CACHE_HOME"], ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 """ Contains WikiNamespace type """
 
+from sys import intern
+
 
 # noinspection PyShadowingBuiltins
 # pylint: disable=too-few-public-methods,redefined-builtin
 class WikiNamespace:
     """ Holds data used to identify wiki namespace """
+    __slots__ = ("id", "name", "has_content")
+
     id: int
     name: str
     has_content: bool
@@ -13,5 +17,5 @@ class WikiNamespace:
         super().__init__()
 
         self.id = id
-        self.name = name
+        self.name = intern(name)
         self.has_content = has_content
@@ -2,39 +2,45 @@
 
 from __future__ import annotations
 
-# noinspection PyPep8Naming
-from mwclient import Site as API
+from sys import intern
 
 from utils.ScorableItem import ScorableItem
 
-# noinspection PyPep8Naming
-
 TITLE_SAFE_CHARACTERS = "/ "
 SPACE_REPLACEMENT = "_"
 
 
 # noinspection PyShadowingBuiltins
-# pylint: disable=too-few-public-methods,redefined-builtin
+# pylint: disable=too-few-public-methods,too-many-instance-attributes,redefined-builtin
 class WikiPage(ScorableItem):
-    """ Holds data used to identify wiki pages """
-    wiki: API
+    """
+    Holds data used to identify wiki pages. Pages are kept in multiple caches,
+    so they only refer to their wiki by its host and share the repeated strings
+    """
+    __slots__ = ("host", "sitename", "wiki_id", "id", "title", "display_title", "namespace", "url")
+
+    host: str
+    sitename: str
+    # Identity of the wiki, shared by the hosts serving the same wiki
+    wiki_id: str
     id: int
     title: str
     display_title: str
     namespace: str
     url: str
 
-    _score: int = 0
-
     # pylint: disable=too-many-arguments
-    def __init__(self, wiki: API, id: int, title: str,
+    def __init__(self, host: str, sitename: str, wiki_id: str, id: int, title: str,
                  display_title: str, namespace: str, url: str) -> None:
         super().__init__()
-        self.wiki = wiki
+        self.host = intern(host)
+        self.sitename = intern(sitename)
+        self.wiki_id = intern(wiki_id)
         self.id = id
         self.title = title
-        self.display_title = display_title
-        self.namespace = namespace
+        # Titles often don't need any improvements, keep a single copy then
+        self.display_title = title if display_title == title else display_title
+        self.namespace = intern(namespace)
         self.url = url
 
     def _get_score_fields(self) -> list[str]:
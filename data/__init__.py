@@ -1,25 +1,169 @@
 """ Contains constants for the project """
 
+import os
 import re
-from typing import Pattern, TypedDict, List, Dict
+from typing import Pattern, TypedDict, Dict, List, Tuple
 
 from data.KnownApiEndpoint import KnownApiEndpoint
 
-MEDIA_WIKI_DETECTION_REGEXES_CONTENT: List[Pattern[str]] = [
-    re.compile(r'<body[^>]{1,250}class="mediawiki"', re.IGNORECASE),
-    re.compile(r'<(?:a|img)[^>]{1,250}>Powered by MediaWiki</a>', re.IGNORECASE),
-    re.compile(r'<a[^>]{1,250}/Special:WhatLinksHere/', re.IGNORECASE),
-]
+# Link to the API description, found in the <head> of every MediaWiki page
+MEDIA_WIKI_EDIT_URI_REGEX: Pattern[bytes] = \
+    re.compile(rb'<link\b[^>]{0,250}\brel=["\']?EditURI\b[^>]{0,250}>', re.IGNORECASE)
+HTML_HREF_REGEX: Pattern[bytes] = re.compile(rb'\bhref=["\']?([^"\'\s>]+)', re.IGNORECASE)
 
-MEDIA_WIKI_DETECTION_REGEXES_META: Dict[str, Pattern[str]] = {
-    "generator": re.compile(r'^MediaWiki ?(.{1,250})$', re.IGNORECASE)
-}
+# Nothing after the end of the <head> is needed to find the API endpoint
+HTML_HEAD_END_REGEX: Pattern[bytes] = re.compile(rb'</head\s*>|<body\b', re.IGNORECASE)
+
+# Maximum number of bytes of a landing page read while looking for the API endpoint
+HTML_HEAD_MAX_BYTES = 64 * 1024
+
+# Size (in bytes) of the chunks the landing page is read in
+HTML_CHUNK_SIZE = 4 * 1024
 
 MEDIA_WIKI_USER_AGENT = \
     "Ulauncher Wiki Search (https://github.com/zakuciael/ulauncher-wiki-search)"
 
 COMMON_API_ENDPOINTS = ["/", "/w/", "/wiki/"]
 
+# Directory where the extension keeps data that survives restarts
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "ulauncher-wiki-search"
+)
+
+# Time (in seconds) after which resolved API endpoints are revalidated
+ENDPOINT_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Time (in seconds) after which cached search results are refreshed in the background
+RESULT_CACHE_TTL = 24 * 60 * 60
+
+# Time (in seconds) after which cached search results are no longer used
+RESULT_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+# Maximum number of search results kept on the disk
+RESULT_CACHE_MAX_ENTRIES = 1000
+
+# Number of searches whose candidates are kept to answer longer queries starting with the same text
+CANDIDATE_CACHE_SIZE = 64
+
+# Minimum length of a query whose candidates can be reused for longer queries
+PREFIX_REUSE_MIN_LENGTH = 3
+
+# Maximum number of memoized fuzzy scores of query and title pairs
+SCORE_CACHE_SIZE = 4096
+
+# Maximum number of pages of a wiki that can be stored in the local title index
+TITLE_INDEX_MAX_PAGES = 200000
+
+# Time (in seconds) after which the title index is rebuilt instead of updated,
+# should not exceed the time for which wikis keep the recent changes (90 days by default)
+TITLE_INDEX_MAX_AGE = 30 * 24 * 60 * 60
+
+# Time (in seconds) between updates of the title index
+TITLE_INDEX_SYNC_INTERVAL = 60 * 60
+
+# Time (in seconds) to wait for a connection to a wiki and for the response
+HTTP_CONNECT_TIMEOUT = 3.05
+HTTP_READ_TIMEOUT = 5
+
+# Number of hosts, and connections per host, kept alive between requests
+HTTP_POOL_CONNECTIONS = 32
+HTTP_POOL_MAXSIZE = 8
+
+# Environment variables sending the HTTP traffic through an archive, for profiling offline.
+# Recording keeps the responses of the wikis, replaying serves them without the network
+# with the recorded latency or the latency (in seconds) from the third variable
+TRAFFIC_RECORD_ENV = "WIKI_SEARCH_RECORD"
+TRAFFIC_REPLAY_ENV = "WIKI_SEARCH_REPLAY"
+TRAFFIC_REPLAY_LATENCY_ENV = "WIKI_SEARCH_REPLAY_LATENCY"
+
+# Time (in seconds) between writes of the recorded traffic
+TRAFFIC_SAVE_INTERVAL = 10
+
+# Maximum number of wikis queried at the same time
+SEARCH_MAX_WORKERS = 8
+
+# Time (in seconds) after which a wiki that did not respond is left out of the results
+SEARCH_TIMEOUT = 5
+
+# Time (in seconds) between checks whether the searches waiting for a worker thread started
+SEARCH_QUEUE_POLL_INTERVAL = 0.05
+
+# Number of the most recent searches of a wiki used to judge its health
+HEALTH_WINDOW = 20
+
+# Minimum number of searches before a wiki can be quarantined or get its own deadline
+HEALTH_MIN_SAMPLES = 5
+
+# Fraction of failed searches after which a wiki is quarantined
+HEALTH_MAX_ERROR_RATE = 0.5
+
+# Time (in seconds) before a quarantined wiki is probed again, doubled after each failed probe
+HEALTH_QUARANTINE = 30
+HEALTH_MAX_QUARANTINE = 10 * 60
+
+# Deadline of a wiki as a multiple of its 95th percentile latency,
+# and the shortest deadline (in seconds) any wiki can get
+HEALTH_DEADLINE_FACTOR = 2
+HEALTH_MIN_DEADLINE = 1
+
+# Number of pages requested from a wiki when the fetch is not planned
+SEARCH_LIMIT = 10
+
+# Number of candidates fetched from all wikis together, as a multiple of the results shown.
+# Each wiki gets a part based on its share of the recent top results, within the bounds as long
+# as the budget allows it. A wiki whose last fetched page still made it to the top results
+# is asked for more pages once
+FETCH_BUDGET_FACTOR = 3
+FETCH_MIN_LIMIT = 3
+FETCH_MAX_LIMIT = 50
+
+# Weight of the latest search in the shares of the wikis, and the share every wiki is assumed
+# to have on top of its own, so a wiki that stopped contributing can still catch up
+FETCH_SHARE_DECAY = 0.2
+FETCH_SHARE_SMOOTHING = 0.1
+
+# Maximum length of a query searched by the title prefix first, when using the "auto" strategy
+PREFIX_SEARCH_MAX_LENGTH = 12
+
+# Maximum number of queries in the frequency table, their counts are halved every half-life
+# (in seconds) and opening a result counts as this many searches
+QUERY_STATS_MAX_ENTRIES = 200
+QUERY_STATS_HALF_LIFE = 7 * 24 * 60 * 60
+QUERY_STATS_OPEN_WEIGHT = 5
+
+# Time (in seconds) without a keystroke after which the typed query counts as searched
+QUERY_STATS_TYPING_PAUSE = 2
+
+# Time (in seconds) after the startup and between the runs refreshing the cached results
+# of the most frequent queries
+WARMUP_STARTUP_DELAY = 30
+WARMUP_INTERVAL = 15 * 60
+
+# Maximum number of queries and requests of a single warm-up run (searching a wiki counts
+# as a single request), and the pause (in seconds) between the queries
+WARMUP_MAX_QUERIES = 20
+WARMUP_REQUEST_BUDGET = 100
+WARMUP_QUERY_DELAY = 1
+
+# Time (in seconds) since the last search after which the user is considered idle
+WARMUP_IDLE_TIME = 10
+
+# Fields of the pages used by the search, other fields are skipped while decoding responses
+PAGE_FIELDS = ["pageid", "ns", "title", "displaytitle", "fullurl", "index", "categories",
+               "langlinks"]
+
+# Maximum size (in bytes) of a decompressed search response, larger responses are dropped,
+# and the size of the parts it's read in
+RESPONSE_MAX_BYTES = 1024 * 1024
+RESPONSE_CHUNK_SIZE = 16 * 1024
+
+# Number of the most recent durations of each phase used to calculate the percentiles
+METRICS_SAMPLES = 200
+
+# Minimum time (in seconds) between writes of the metrics file
+METRICS_SAVE_INTERVAL = 60
+
 KNOWN_API_ENDPOINTS: List[KnownApiEndpoint] = [
     KnownApiEndpoint(
         regex=re.compile(r"^(?!www).+\.fandom.com$", re.IGNORECASE),
@@ -35,9 +179,36 @@ KNOWN_API_ENDPOINTS: List[KnownApiEndpoint] = [
     )
 ]
 
+# Preferences stored by Ulauncher as "True"/"False" strings
+BOOLEAN_PREFERENCES = ["improved_titles", "improved_filters", "progressive_results",
+                       "loading_placeholder", "show_metrics"]
+
+# Preferences stored by Ulauncher as strings holding whole numbers,
+# with their defaults and allowed ranges
+INTEGER_PREFERENCES: Dict[str, Tuple[int, int, int]] = {
+    "result_limit": (8, 1, 50),
+    "min_score": (60, 0, 100)
+}
+
+# Preferences the cached results depend on, results cached with other values are invalidated
+RESULT_PREFERENCES = ["search_strategy", "improved_titles", "improved_filters", "duplicates",
+                      "result_limit", "min_score"]
+
 Improvement = TypedDict("Improvement", {"regex": Pattern[str], "replacement": str})
 
 TITLE_READABILITY_IMPROVEMENTS: List[Improvement] = [
     {"regex": re.compile(r":"), "replacement": ": "},
     {"regex": re.compile(r"/"), "replacement": " - "}
 ]
+
+# Categories of pages that only hold formatting (templates, styles) for other pages
+FORMATTING_CATEGORY_REGEX = re.compile(r"(?:Category:)?Format(?:ting)?(?:\s+)?subpage(?:s)?")
+
+# Only the categories matching the regex above are requested, so the number of categories
+# a wiki assigns to its pages doesn't affect the size of the responses
+FORMATTING_CATEGORIES = [
+    f"Category:{format_name}{separator}{subpage}"
+    for format_name in ("Format", "Formatting")
+    for separator in ("", " ")
+    for subpage in ("subpage", "subpages")
+]
@@ -0,0 +1,28 @@
+""" Contains class for handling opened results from Ulauncher"""
+
+from typing import TYPE_CHECKING
+
+from ulauncher.api.client.EventListener import EventListener
+from ulauncher.api.shared.action.OpenUrlAction import OpenUrlAction
+from ulauncher.api.shared.event import ItemEnterEvent
+
+if TYPE_CHECKING:
+    from main import WikiSearchExtension
+
+
+# pylint: disable=too-few-public-methods
+class ItemEnterEventListener(EventListener):
+    """ Handles opened results and counts them """
+
+    def on_event(self, event: ItemEnterEvent, extension: 'WikiSearchExtension') -> OpenUrlAction:
+        """
+        Handles the item enter event
+        :param event: Event data
+        :param extension: Extension class
+        :return: Action opening the page
+        """
+
+        data = event.get_data()
+        extension.record_open(data["query"])
+
+        return OpenUrlAction(data["url"])
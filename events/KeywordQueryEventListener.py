@@ -1,14 +1,23 @@
 """ Contains class for handling keyword events from Ulauncher"""
 
-from typing import TYPE_CHECKING
+import json
+import time
+from concurrent.futures import CancelledError
+from typing import TYPE_CHECKING, List, Optional
 
 from ulauncher.api.client.EventListener import EventListener
+from ulauncher.api.shared.action.CopyToClipboardAction import CopyToClipboardAction
+from ulauncher.api.shared.action.DoNothingAction import DoNothingAction
+from ulauncher.api.shared.action.ExtensionCustomAction import ExtensionCustomAction
 from ulauncher.api.shared.action.HideWindowAction import HideWindowAction
-from ulauncher.api.shared.action.OpenUrlAction import OpenUrlAction
 from ulauncher.api.shared.action.RenderResultListAction import RenderResultListAction
 from ulauncher.api.shared.event import KeywordQueryEvent
 from ulauncher.api.shared.item.ExtensionResultItem import ExtensionResultItem
 
+from data.WikiPage import WikiPage
+from utils.Metrics import metrics
+from utils.SortedList import SortedList
+
 if TYPE_CHECKING:
     from main import WikiSearchExtension
 
@@ -18,36 +27,122 @@ class KeywordQueryEventListener(EventListener):
     """ Handles users input and searches for results """
 
     def on_event(self, event: KeywordQueryEvent, extension: 'WikiSearchExtension') -> \
-            RenderResultListAction:
+            Optional[RenderResultListAction]:
         """
         Handles the keyword event
         :param event: Event data
         :param extension: Extension class
-        :return: List of actions to render
+        :return: List of actions to render or None if the query was superseded by a newer one
         """
 
+        with metrics.span("event"):
+            action = self._search(event, extension)
+
+        metrics.save()
+        return action
+
+    def _search(self, event: KeywordQueryEvent, extension: 'WikiSearchExtension') -> \
+            Optional[RenderResultListAction]:
+        """
+        Searches for the query and renders the results
+        :param event: Event data
+        :param extension: Extension class
+        :return: List of actions to render or None if the query was superseded by a newer one
+        """
+
+        started = time.perf_counter()
         query = event.get_argument()
-        pages = extension.search(query) if query else None
 
-        results = []
+        def on_update(pages: SortedList[WikiPage], pending: int) -> None:
+            placeholder = extension.preferences["loading_placeholder"]
+
+            # Don't flash the "No results found" item while other wikis are still loading
+            if len(pages) == 0 and not placeholder:
+                return
+
+            extension.send_action(event, RenderResultListAction(
+                self._render_pages(pages, query, extension, pending if placeholder else 0)
+            ))
+
+        progressive = extension.preferences["progressive_results"]
+        try:
+            pages = extension.search(query, on_update if progressive else None) if query else None
+        except CancelledError:
+            # The user kept typing, results of this query would be replaced anyway
+            return None
+
         if not pages or len(pages) == 0:
-            results.append(
+            items = [
                 ExtensionResultItem(
                     icon=extension.get_base_icon(),
                     name="No results found",
                     on_enter=HideWindowAction()
                 )
-            )
-            return RenderResultListAction(results)
+            ]
+        else:
+            with metrics.span("render"):
+                items = self._render_pages(pages, query, extension)
+
+        if extension.preferences["show_metrics"]:
+            items.append(self._render_metrics(extension, time.perf_counter() - started))
+
+        return RenderResultListAction(items)
 
+    @staticmethod
+    def _render_metrics(extension: 'WikiSearchExtension', duration: float) -> \
+            ExtensionResultItem:
+        """
+        Creates an item showing how long the search took and which wikis are the slowest
+        :param extension: Extension class
+        :param duration: Duration of the search (in seconds)
+        :return: Result item, copying all collected metrics on enter
+        """
+
+        slowest = []
+        for wiki, timing in metrics.slowest_wikis(2):
+            failed = timing["errors"] / timing["count"]
+            slowest.append(f"{wiki} {timing['p95_ms']:.0f}ms" +
+                           (f" ({failed:.0%} failed)" if failed else ""))
+
+        return ExtensionResultItem(
+            icon=extension.get_base_icon(),
+            name=f"Searched in {duration * 1000:.0f}ms",
+            description=f"Slowest wikis (p95): {', '.join(slowest) or 'none yet'}",
+            on_enter=CopyToClipboardAction(json.dumps(metrics.summary(), indent=2))
+        )
+
+    @staticmethod
+    def _render_pages(pages: SortedList[WikiPage], query: str, extension: 'WikiSearchExtension',
+                      pending: int = 0) -> List[ExtensionResultItem]:
+        """
+        Converts pages into result items
+        :param pages: Pages to convert
+        :param query: Text that was searched
+        :param extension: Extension class
+        :param pending: Number of wikis that are still loading,
+        adds a placeholder item if greater than 0
+        :return: List of result items
+        """
+
+        results = []
         for page in pages:
             results.append(
                 ExtensionResultItem(
                     name=page.display_title,
-                    description=f"{page.wiki.site['sitename']} - {page.namespace}",
+                    description=f"{page.sitename} - {page.namespace}",
+                    icon=extension.get_base_icon(),
+                    # Opened through the extension, so it can count the opened results
+                    on_enter=ExtensionCustomAction({"query": query, "url": page.url})
+                )
+            )
+
+        if pending > 0:
+            results.append(
+                ExtensionResultItem(
                     icon=extension.get_base_icon(),
-                    on_enter=OpenUrlAction(page.url)
+                    name=f"Still loading {pending} wiki{'s' if pending > 1 else ''}...",
+                    on_enter=DoNothingAction()
                 )
             )
 
-        return RenderResultListAction(results)
+        return results
@@ -5,6 +5,8 @@ from typing import TYPE_CHECKING
 from ulauncher.api.client.EventListener import EventListener
 from ulauncher.api.shared.event import PreferencesEvent
 
+from data import BOOLEAN_PREFERENCES, INTEGER_PREFERENCES
+
 if TYPE_CHECKING:
     from main import WikiSearchExtension
 
@@ -20,8 +22,13 @@ class PreferencesEventListener(EventListener):
         :param extension: Extension class
         """
 
-        event.preferences["improved_titles"] = event.preferences["improved_titles"] == "True"
-        event.preferences["improved_filters"] = event.preferences["improved_filters"] == "True"
+        for key in BOOLEAN_PREFERENCES:
+            event.preferences[key] = event.preferences.get(key) == "True"
+        for key in INTEGER_PREFERENCES:
+            event.preferences[key] = extension.parse_integer_preference(
+                key, event.preferences.get(key))
         extension.preferences.update(event.preferences)
 
+        extension.parse_preferred_urls(event.preferences.get("preferred_wikis"))
         extension.parse_wiki_urls(event.preferences.get("wiki_urls"))
+        extension.parse_title_index_urls(event.preferences.get("title_index"))
@@ -5,6 +5,8 @@ from typing import TYPE_CHECKING
 from ulauncher.api.client.EventListener import EventListener
 from ulauncher.api.shared.event import PreferencesUpdateEvent
 
+from data import BOOLEAN_PREFERENCES, INTEGER_PREFERENCES, RESULT_PREFERENCES
+
 if TYPE_CHECKING:
     from main import WikiSearchExtension
 
@@ -24,10 +26,19 @@ class PreferencesUpdateEventListener(EventListener):
         if event.id == "wiki_urls":
             extension.parse_wiki_urls(event.new_value)
 
-        if event.id == "improved_titles":
-            event.new_value = event.new_value == "True"
+        if event.id == "preferred_wikis":
+            extension.parse_preferred_urls(event.new_value)
+
+        if event.id == "title_index":
+            extension.parse_title_index_urls(event.new_value)
 
-        if event.id == "improved_filters":
+        if event.id in BOOLEAN_PREFERENCES:
             event.new_value = event.new_value == "True"
 
+        if event.id in INTEGER_PREFERENCES:
+            event.new_value = extension.parse_integer_preference(event.id, event.new_value)
+
         extension.preferences[event.id] = event.new_value
+
+        if event.id in RESULT_PREFERENCES:
+            extension.invalidate_results()
@@ -1,41 +1,74 @@
 """ Ulauncher extension that lets you search and open MediaWiki pages """
 from __future__ import annotations
 
+import atexit
 import os
 import re
-from typing import cast, Dict
+from concurrent.futures import Future
+from threading import Lock, Thread
+from typing import cast, Callable, List, Optional, Tuple
 # noinspection PyPep8Naming
 from urllib.parse import ParseResult as URL, urlparse
 
-import requests
-import validators
-from bs4 import BeautifulSoup
-from cachetools import LRUCache, cachedmethod
-from cachetools.keys import hashkey
+from cachetools import LRUCache
 from ulauncher.api.client.Extension import Extension
-from ulauncher.api.shared.event import KeywordQueryEvent, PreferencesUpdateEvent, PreferencesEvent
-
-from data import MEDIA_WIKI_DETECTION_REGEXES_META, MEDIA_WIKI_DETECTION_REGEXES_CONTENT, \
-    COMMON_API_ENDPOINTS, KNOWN_API_ENDPOINTS, MEDIA_WIKI_USER_AGENT, TITLE_READABILITY_IMPROVEMENTS
+from ulauncher.api.shared.Response import Response
+from ulauncher.api.shared.action.BaseAction import BaseAction
+from ulauncher.api.shared.event import BaseEvent, KeywordQueryEvent, PreferencesUpdateEvent, \
+    PreferencesEvent, ItemEnterEvent
+
+from data import MEDIA_WIKI_USER_AGENT, SEARCH_TIMEOUT, CACHE_DIR, RESULT_CACHE_TTL, \
+    RESULT_CACHE_MAX_AGE, RESULT_CACHE_MAX_ENTRIES, CANDIDATE_CACHE_SIZE, PREFIX_REUSE_MIN_LENGTH, \
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, \
+    RESULT_PREFERENCES, TRAFFIC_RECORD_ENV, TRAFFIC_REPLAY_ENV, TRAFFIC_REPLAY_LATENCY_ENV, \
+    TRAFFIC_SAVE_INTERVAL, INTEGER_PREFERENCES
 from data.WikiPage import WikiPage
+from events.ItemEnterEventListener import ItemEnterEventListener
 from events.KeywordQueryEventListener import KeywordQueryEventListener
 from events.PreferencesEventListener import PreferencesEventListener
 from events.PreferencesUpdateEventListener import PreferencesUpdateEventListener
-# noinspection PyPep8Naming
-from utils.API import API
+from utils.CacheWarmer import CacheWarmer
+from utils.EndpointResolver import EndpointResolver
+from utils.Metrics import metrics
+from utils.QueryStats import QueryStats
+from utils.ResultCache import ResultCache
+from utils.Session import Session
 from utils.SortedList import SortedList
+from utils.TrafficArchive import TrafficArchive
+from utils.WikiRegistry import WikiRegistry
+from utils.WikiSearcher import WikiSearcher
 
 
 class WikiSearchExtension(Extension):
     """ Main Extension Class  """
 
-    _apis: Dict[str, API] = {}
     _cache: LRUCache = LRUCache(maxsize=32)
+    _candidates: LRUCache = LRUCache(maxsize=CANDIDATE_CACHE_SIZE)
+    _cache_lock: Lock
+    # Normalized query of the most recent search and the future cancelling it
+    _active_search: Tuple[str, Future] | None = None
+    _wikis: WikiRegistry
+    _searcher: WikiSearcher
+    _results: ResultCache
+    _queries: QueryStats
+    _warmer: CacheWarmer
 
     def __init__(self):
         """ Initializes the extension """
         super().__init__()
+        self._cache_lock = Lock()
+        session = Session(MEDIA_WIKI_USER_AGENT, (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                          HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE)
+        self._archive_traffic(session)
+        self._searcher = WikiSearcher(self.preferences)
+        self._wikis = WikiRegistry(EndpointResolver(session), self._sync_title_indexes)
+        self._results = ResultCache(os.path.join(CACHE_DIR, "results.sqlite3"), RESULT_CACHE_TTL,
+                                    RESULT_CACHE_MAX_AGE, RESULT_CACHE_MAX_ENTRIES)
+        self._queries = QueryStats(os.path.join(CACHE_DIR, "queries.json"))
+        self._warmer = CacheWarmer(self._queries, self._warm_query, self._queries.idle_time)
+        self._warmer.start()
         self.subscribe(KeywordQueryEvent, KeywordQueryEventListener())
+        self.subscribe(ItemEnterEvent, ItemEnterEventListener())
         self.subscribe(PreferencesEvent, PreferencesEventListener())
         self.subscribe(PreferencesUpdateEvent, PreferencesUpdateEventListener())
 
@@ -52,6 +85,16 @@ class WikiSearchExtension(Extension):
 
         return path
 
+    def send_action(self, event: BaseEvent, action: BaseAction) -> None:
+        """
+        Sends an action to Ulauncher outside the regular event listener flow,
+        used to render results before the event listener returns
+        :param event: Event that the action responds to
+        :param action: Action to send
+        """
+
+        self._client.send(Response(event, action))
+
     @staticmethod
     def _parse_url(raw_url: str) -> URL | None:
         """
@@ -60,6 +103,10 @@ class WikiSearchExtension(Extension):
         :return: Parsed URL or None if invalid
         """
 
+        # Validators compile large regexes on import, don't delay the start of the extension
+        # pylint: disable=import-outside-toplevel
+        import validators
+
         # Add dummy "http" schema in front of the URL if it starts with "//" to support RFC 1808
         if validators.url("http:" + raw_url if re.match(r"^//", raw_url) else raw_url):
             return urlparse(raw_url)
@@ -69,236 +116,341 @@ class WikiSearchExtension(Extension):
         return None
 
     @staticmethod
-    def _url_to_api(url: URL) -> API:
+    def _parse_url_list(raw_urls: str | None) -> List[URL]:
         """
-        Converts URL into MediaWiki API object
-        :param url: URL to convert
-        :return: MediaWiki API object
+        Validates and parses list of URLs separated by "|" or whitespace
+        :param raw_urls: Raw list of URLs
+        :return: Parsed URLs, the invalid ones are left out
         """
 
-        return API(
-            host=url.netloc,
-            scheme=url.scheme,
-            path=url.path,
-            clients_useragent=MEDIA_WIKI_USER_AGENT,
-            force_login=False
-        )
+        return list(filter(None, [WikiSearchExtension._parse_url(raw_url.strip())
+                                  for raw_url in re.findall(r"(?: *\| *)?(\S+)", raw_urls or "")]))
 
-    @staticmethod
-    def _request(url: str, params=None, **kwargs):
-        r"""
-        Wrapper for the `requests.get` method
-        that automatically adds proper user agent to the request
-        :param url: URL for the new :class:`Request` object.
-        :param params: (optional) Dictionary, list of tuples or bytes to send
-        in the query string for the :class:`Request`.
-        :param kwargs: \*\*kwargs: Optional arguments that ``request`` takes.
-        :return: :class:`Response <Response>` object
-        :rtype: requests.Response
+    def _archive_traffic(self, session: Session) -> None:
+        """
+        Records the HTTP traffic to an archive, or replays it from one, if the environment
+        asks for it. Lets a session be profiled again and again on the same responses
+        :param session: Session used for all requests
         """
 
-        return requests.get(url, params=params, **kwargs,
-                            headers={"user-agent": MEDIA_WIKI_USER_AGENT})
+        if os.environ.get(TRAFFIC_RECORD_ENV):
+            archive = TrafficArchive(os.environ[TRAFFIC_RECORD_ENV], TRAFFIC_SAVE_INTERVAL)
+            session.record(archive)
+            # The session is never closed, write the responses of the last interval on exit
+            atexit.register(archive.save, force=True)
+            self.logger.info("Recording traffic to %s", os.environ[TRAFFIC_RECORD_ENV])
+        elif os.environ.get(TRAFFIC_REPLAY_ENV):
+            archive = TrafficArchive(os.environ[TRAFFIC_REPLAY_ENV], TRAFFIC_SAVE_INTERVAL)
+            archive.load()
+
+            latency = os.environ.get(TRAFFIC_REPLAY_LATENCY_ENV)
+            session.replay(archive, float(latency) if latency else None)
+            self.logger.info("Replaying %d recorded responses from %s", len(archive),
+                             os.environ[TRAFFIC_REPLAY_ENV])
 
-    # noinspection PyProtectedMember
-    def _get_api(self, url: URL) -> API | None:
+    def parse_wiki_urls(self, raw_wiki_urls: str) -> None:
         """
-        Resolves MediaWiki API from the provided url
-        :param url: URL pointing to the MediaWiki site
-        :return: MediaWiki API or None if not resolved
+        Parses raw list of wiki urls and adds them to the list.
+        Wikis known from the previous configuration or the endpoint cache are ready right away,
+        the rest is discovered in the background and added to the list once resolved
+        :param raw_wiki_urls: Raw list of wiki urls
         """
 
-        # If there is no scheme specified set it as "http" and relay on the https redirect
-        if not url.scheme:
-            url = url._replace(scheme="http")
+        if not raw_wiki_urls:
+            return
+
+        self.logger.info("Parsing wiki urls...")
+        removed = self._wikis.configure(self._parse_url_list(raw_wiki_urls))
+        self._forget_wikis(removed)
+        self._sync_title_indexes()
 
-        res = self._request(url.geturl())
+    def _forget_wikis(self, hosts: List[str]) -> None:
+        """
+        Drops everything kept for the wikis removed from the configuration.
+        Results cached in the memory are ranked again without the pages of the removed wikis,
+        results of the unchanged configurations are kept
+        :param hosts: Hosts of the removed wikis
+        """
 
-        # Maybe the site doesn't support https redirects? Let's try doing that manually
-        if not res.ok:
-            url = url._replace(scheme="https")
-            res = self._request(url.geturl())
+        if not hosts:
+            return
 
-        # Either the response was unsuccessful or the returned response type was not HTML
-        content_type = res.headers.get("content-type")
-        if not res.ok or "text/html" not in (content_type or ""):
-            return None
+        removed = set(hosts)
+        with self._cache_lock:
+            for key in [key for key in self._candidates if not removed.isdisjoint(key[1])]:
+                candidates = [page for page in self._candidates.pop(key)
+                              if page.host not in removed]
+                pages = self._searcher.rank(key[0], candidates)
 
-        new_url = urlparse(res.url)
-        url = url._replace(scheme=new_url.scheme)
+                rekeyed = (key[0], tuple(host for host in key[1] if host not in removed), *key[2:])
+                self._candidates[rekeyed] = candidates
+                self._cache[rekeyed] = pages
 
-        # Let's check if the site is running MediaWiki
-        media_wiki: bool = any(
-            regex.findall(res.text) for regex in MEDIA_WIKI_DETECTION_REGEXES_CONTENT)
+        self._searcher.forget(hosts)
 
-        if not media_wiki:
-            soup = BeautifulSoup(res.text, "html.parser")
-            media_wiki = any(regex.match(
-                (soup.find("meta", attrs={"name": key}) or {}).get("content") or ""
-            ) for key, regex in MEDIA_WIKI_DETECTION_REGEXES_META.items())
+        self._invalidate_results(lambda key: not removed.isdisjoint(key[1]))
+        self.logger.debug("Removed wikis: %s", ", ".join(hosts))
 
-        if not media_wiki:
-            return None
+    def _invalidate_results(self, stale: Callable[[Tuple], bool]) -> None:
+        """
+        Drops the matching results cached both in the memory and on the disk
+        :param stale: Returns True for the cache keys of the results to drop
+        """
 
-        # Final part, let's resolve the actual API endpoint
-        # First let's check common websites
-        known_api_endpoint = next(endpoint_data for endpoint_data in KNOWN_API_ENDPOINTS if
-                                  endpoint_data.regex.match(cast(str, url.hostname)))
-
-        if known_api_endpoint:
-            url = url._replace(path=known_api_endpoint.path)
-            return self._url_to_api(url)
-
-        # Otherwise, check common API endpoints and try to determine the valid one
-        for common_endpoint in COMMON_API_ENDPOINTS:
-            url = url._replace(path=common_endpoint)
-            res = self._request(url.geturl() + "api.php", params={
-                "format": "json",
-                "action": "query",
-                "meta": "siteinfo",
-                "siprop": "general"
-            })
-
-            content_type = res.headers.get("content-type")
-            if res.ok and "application/json" in (content_type or "") and \
-                    not res.json().get("error"):
-                return self._url_to_api(url)
+        with self._cache_lock:
+            for cache in (self._cache, self._candidates):
+                for key in [key for key in cache if stale(key)]:
+                    del cache[key]
 
-        return None
+        self._results.invalidate(stale)
 
-    def parse_wiki_urls(self, raw_wiki_urls: str) -> None:
+    def invalidate_results(self) -> None:
+        """ Drops the results cached with other values of the preferences they depend on """
+
+        current = self._cache_key("")[2:]
+        self._invalidate_results(lambda key: key[2:] != current)
+
+    def wait_for_wikis(self, timeout: float | None = None, first: bool = False) -> bool:
         """
-        Parses raw list of wiki urls and adds them to the list
-        :param raw_wiki_urls: Raw list of wiki urls
+        Waits until the wikis discovered in the background are resolved
+        :param timeout: (optional) Maximum time (in seconds) to wait
+        :param first: (optional) Whether to wait only until any wiki can be searched
+        :return: True if the wikis are ready, False if the timeout expired
         """
 
-        if not raw_wiki_urls:
-            return
+        return self._wikis.wait(timeout, first)
 
-        self.logger.info("Parsing wiki urls...")
-        matches = list(filter(None, [self._parse_url(raw_url.strip()) for raw_url in
-                                     re.findall(r"(?: *\| *)?(\S+)", raw_wiki_urls)]))
+    def parse_integer_preference(self, key: str, raw_value: str | None) -> int:
+        """
+        Parses a preference holding a whole number, keeping it within its allowed range
+        :param key: Id of the preference
+        :param raw_value: Raw value of the preference
+        :return: Parsed value, or the default value if the raw value is not a number
+        """
 
-        endpoints: list[API] = []
+        default, minimum, maximum = INTEGER_PREFERENCES[key]
+        try:
+            value = int((raw_value or "").strip())
+        except ValueError:
+            self.logger.warning("Invalid value of the %s preference: %s", key, raw_value)
+            return default
 
-        for url in matches:
-            self.logger.debug("Resolving API endpoint for %s", url.netloc)
-            endpoint: API | None = None
+        return min(maximum, max(minimum, value))
 
-            if self._apis.get(url.netloc):
-                endpoint = cast(API, self._apis.get(url.netloc))
-                endpoints.append(endpoint)
-                self.logger.debug("API endpoint found in cache: hostname=%s scheme=%s, path=%s",
-                                  endpoint.host, endpoint.scheme, endpoint.path)
-                continue
+    def parse_preferred_urls(self, raw_wiki_urls: str) -> None:
+        """
+        Parses raw list of wiki urls whose pages are preferred over the same pages of other wikis
+        :param raw_wiki_urls: Raw list of wiki urls
+        """
 
-            endpoint = self._get_api(url)
-            if endpoint:
-                endpoints.append(endpoint)
-                self.logger.debug("Resolved API endpoint: hostname=%s scheme=%s, path=%s",
-                                  endpoint.host, endpoint.scheme, endpoint.path)
-                continue
+        # Results are cached by the order of the wikis, a new order doesn't match them
+        self._wikis.prefer(self._parse_url_list(raw_wiki_urls))
 
-            self.logger.warning("Unable to resolve API endpoint for %s", url.netloc)
+    def parse_title_index_urls(self, raw_wiki_urls: str) -> None:
+        """
+        Parses raw list of wiki urls and enables local title index for them
+        :param raw_wiki_urls: Raw list of wiki urls
+        """
 
-        self._apis = {}
-        for endpoint in endpoints:
-            self._apis[endpoint.host] = endpoint
+        changed = self._searcher.title_indexes.enable(
+            [url.netloc for url in self._parse_url_list(raw_wiki_urls)], self._wikis.resolved
+        )
+
+        # Only the wikis that started or stopped using the index return different results
+        if changed:
+            self._invalidate_results(lambda key: not changed.isdisjoint(key[1]))
 
-        self._cache.clear()
+    def _sync_title_indexes(self) -> None:
+        """
+        Opens the title indexes of the resolved wikis and starts updating the outdated ones
+        in the background
+        """
 
-        self.logger.info("Parsing completed, resolved %s/%s URLs", len(endpoints), len(matches))
+        self._searcher.title_indexes.sync(self._wikis.resolved)
 
-    @cachedmethod(lambda self: self._cache, lambda self, query: hashkey(query.lower().strip()))
-    def search(self, query: str) -> SortedList[WikiPage]:
+    def search(self, query: str,
+               on_update: Optional[Callable[[SortedList[WikiPage], int], None]] = None) -> \
+            SortedList[WikiPage]:
         """
         Searches wikis for the query and returns combined results from all of them
         :param query: Text to search
+        :param on_update: (optional) Called with the results gathered so far and the number
+        of wikis that are still loading, each time a wiki responds before the search completes
         :return: Combined results
+        :raises CancelledError: If a newer search was started before this one completed
+        """
+
+        self._queries.record_search(query)
+        cancelled = self._supersede_search(query)
+
+        # Right after the startup, wait for the first wiki instead of finding nothing
+        self.wait_for_wikis(SEARCH_TIMEOUT, first=True)
+
+        key = self._cache_key(query)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            metrics.count("memory_hits")
+            return cached
+
+        stored, stale = self._results.get(key, self._wikis.apis)
+        if stored is not None:
+            metrics.count("disk_hits")
+            pages = self._searcher.create_list(query)
+            pages.extend(stored)
+            with self._cache_lock:
+                self._cache[key] = pages
+
+            # Serve the stale results right away and refresh them for the next search
+            if stale:
+                self._refresh(query, key)
+
+            return pages
+
+        reused = self._reuse_candidates(query, key)
+        if reused is not None:
+            metrics.count("reuse_hits")
+            return reused
+
+        metrics.count("misses")
+        pages, candidates, complete = self._searcher.search(key, query, self._wikis.apis,
+                                                            on_update, cancelled)
+
+        # Don't cache partial results, the next search should retry the missing wikis
+        if complete and not self._wikis.discovering:
+            self._store(key, pages, candidates)
+
+        return pages
+
+    def record_open(self, query: str) -> None:
+        """
+        Counts a result of the query being opened, such queries are kept warm in the cache
+        :param query: Text that was searched
+        """
+
+        self._queries.record_open(query)
+
+    def _warm_query(self, query: str) -> int:
+        """
+        Searches the wikis for the query in the background, unless its cached results are fresh
+        :param query: Text to search
+        :return: Number of wikis that were searched
+        """
+
+        key = self._cache_key(query)
+        wikis = self._wikis.apis
+        if not wikis or self._results.is_fresh(key):
+            return 0
+
+        candidates, searched = self._searcher.warm(query, wikis, self._queries.idle_time)
+
+        # Skip if a wiki was left out or the configuration changed in the meantime
+        if candidates is not None and key == self._cache_key(query):
+            self._store(key, self._searcher.rank(query, candidates), candidates)
+            metrics.count("warmed")
+
+        return searched
+
+    def _supersede_search(self, query: str) -> Future:
         """
+        Cancels the previous search, each keystroke starts a new one
+        so only the most recent search is worth completing.
+        A repeated search for the same query continues the previous one instead
+        :param query: Text to search
+        :return: Future resolved when this search gets superseded by a newer one
+        """
+
+        normalized = query.lower().strip()
+        with self._cache_lock:
+            previous = self._active_search
+            if previous and previous[0] == normalized and not previous[1].done():
+                return previous[1]
 
-        pages = SortedList[WikiPage](query, min_score=60, limit=8)
-
-        for wiki in self._apis.values():
-            namespaces = list(filter(
-                lambda value: value.has_content,
-                wiki.namespaces.values()
-            ))
-
-            result = wiki.get(
-                # Basic Options
-                action="query",
-                prop=["categories", "langlinks", "info"],
-                generator="search",
-                # Categories Options
-                cllimit=500,
-                # Language Links Options
-                lllang="en",
-                lllimit=500,
-                # Info Options
-                inprop=["displaytitle", "url"],
-                # Generator Options
-                gsrsearch=query,
-                gsrnamespace=list(map(lambda value: value.id, namespaces)),
-                gsrlimit=10
-            )
-
-            if "query" not in result or not result["query"] or "pages" not in result["query"] or \
-                    not result["query"]["pages"]:
-                continue
-
-            raw_pages = cast(dict, result["query"]["pages"]).values()
-
-            for raw_page in raw_pages:
-                title = cast(str, raw_page["title"])
-                display_title = cast(str, raw_page["displaytitle"])
-                namespace = next((namespace.name for namespace in namespaces
-                                  if namespace.id == raw_page["ns"]), None)
-
-                if self.preferences["improved_filters"]:
-                    # Filter main page
-                    if title == cast(str, wiki.site["mainpage"]):
-                        continue
-
-                    # Filter translation pages
-                    if len(raw_page["langlinks"] if "langlinks" in raw_page else []) > 0:
-                        continue
-
-                    # Filter formatting pages
-                    formatting_category = next((category for category in (
-                        cast(list, raw_page["categories"]) if "categories" in raw_page else []
-                    ) if re.match(
-                        r"(?:Category:)?Format(?:ting)?(?:\s+)?subpage(?:s)?",
-                        category["title"]
-                    )), None)
-
-                    if formatting_category:
-                        continue
-
-                if self.preferences["improved_titles"]:
-                    for improvement in TITLE_READABILITY_IMPROVEMENTS:
-                        display_title = improvement["regex"].sub(
-                            improvement["replacement"],
-                            display_title
-                        )
-
-                        # Strip namespace from the title
-                        if namespace:
-                            display_title = re.sub(rf"{namespace}:\s+", "", display_title)
-
-                pages.append(
-                    WikiPage(
-                        wiki=wiki,
-                        id=cast(int, raw_page["pageid"]),
-                        title=title,
-                        display_title=display_title,
-                        namespace=namespace or "Unknown",
-                        url=cast(str, raw_page["fullurl"])
-                    )
-                )
+            cancelled: Future = Future()
+            self._active_search = (normalized, cancelled)
+
+        if previous and not previous[1].done():
+            previous[1].set_result(None)
+
+        return cancelled
+
+    def _reuse_candidates(self, query: str, key: Tuple) -> SortedList[WikiPage] | None:
+        """
+        Ranks candidates fetched for a shorter query, starting with the same text,
+        against the query, so typing a word doesn't search the wikis on every keystroke
+        :param query: Text to search
+        :param key: Cache key of the query
+        :return: Results or None if the candidates are missing or can't fill the list
+        """
+
+        normalized = cast(str, key[0])
+        candidates: List[WikiPage] | None = None
+
+        with self._cache_lock:
+            for length in range(len(normalized) - 1, PREFIX_REUSE_MIN_LENGTH - 1, -1):
+                candidates = self._candidates.get((normalized[:length], *key[1:]))
+                if candidates is not None:
+                    break
+
+        if candidates is None:
+            return None
+
+        pages = self._searcher.rank(query, candidates)
+        if len(pages) < pages.limit:
+            return None
+
+        self.logger.debug("Reused candidates of a shorter query for %s", normalized)
+        with self._cache_lock:
+            self._cache[key] = pages
+            self._candidates[key] = candidates
 
         return pages
 
+    def _cache_key(self, query: str) -> Tuple:
+        """
+        Creates a cache key for the query, based on the configured wikis and preferences
+        :param query: Text to search
+        :return: Cache key
+        """
+
+        return (
+            query.lower().strip(),
+            tuple(self._wikis.apis),
+            *(self.preferences[key] for key in RESULT_PREFERENCES)
+        )
+
+    def _store(self, key: Tuple, pages: SortedList[WikiPage], candidates: List[WikiPage]) -> None:
+        """
+        Caches the results both in the memory and on the disk
+        :param key: Cache key
+        :param pages: Results to cache
+        :param candidates: All pages found by the wikis, before ranking
+        """
+
+        with self._cache_lock:
+            self._cache[key] = pages
+            self._candidates[key] = candidates
+
+        self._results.put(key, list(self._wikis.apis), list(pages))
+
+    def _refresh(self, query: str, key: Tuple) -> None:
+        """
+        Searches the wikis again in the background and replaces the cached results
+        :param query: Text to search
+        :param key: Cache key of the results to replace
+        """
+
+        if self._searcher.searching(key):
+            return
+
+        def refresh():
+            pages, candidates, complete = self._searcher.search(key, query, self._wikis.apis)
+            # Skip if the configuration changed in the meantime
+            if complete and key == self._cache_key(query):
+                self._store(key, pages, candidates)
+
+        # Use a separate thread, the fetch itself waits for the search thread pool
+        Thread(target=refresh, daemon=True).start()
 
 if __name__ == "__main__":
     extension = WikiSearchExtension()
@@ -0,0 +1,91 @@
+""" Contains tests of the fetch planner """
+import unittest
+
+from data import FETCH_BUDGET_FACTOR, FETCH_MIN_LIMIT, FETCH_MAX_LIMIT
+from data.WikiPage import WikiPage
+from utils.FetchPlanner import FetchPlanner
+
+
+def page(host: str, page_id: int) -> WikiPage:
+    """
+    Creates a page found in the wiki
+    :param host: Host of the wiki
+    :param page_id: Id of the page
+    :return: Page with the title made from its id
+    """
+
+    return WikiPage(host, host, host, page_id, f"Page {page_id}", f"Page {page_id}", "",
+                    f"https://{host}/wiki/Page_{page_id}")
+
+
+class FetchPlannerTest(unittest.TestCase):
+    """ Tests splitting the candidate budget between the wikis """
+
+    def test_plan_stays_within_budget(self) -> None:
+        """ The pages of all wikis never exceed the budget """
+
+        for wikis in (1, 5, 20, 50):
+            for limit in (1, 8, 30):
+                with self.subTest(wikis=wikis, limit=limit):
+                    hosts = [f"wiki{index}.org" for index in range(wikis)]
+                    plan = FetchPlanner().plan(hosts, limit)
+
+                    self.assertEqual(set(plan), set(hosts))
+                    self.assertLessEqual(sum(plan.values()), limit * FETCH_BUDGET_FACTOR)
+                    self.assertTrue(all(0 <= pages <= FETCH_MAX_LIMIT
+                                        for pages in plan.values()))
+
+    def test_plan_keeps_bounds_within_budget(self) -> None:
+        """ Each wiki gets at least and at most the bounds while the budget allows it """
+
+        plan = FetchPlanner().plan(["a.org", "b.org"], 8)
+
+        self.assertEqual(plan, {"a.org": 12, "b.org": 12})
+        self.assertEqual(FetchPlanner().plan(["a.org"], 1), {"a.org": FETCH_MIN_LIMIT})
+        self.assertEqual(FetchPlanner().plan(["a.org"], 30), {"a.org": FETCH_MAX_LIMIT})
+
+    def test_plan_favours_contributing_wikis(self) -> None:
+        """ Wikis with the most results shown get the most pages """
+
+        hosts = [f"wiki{index}.org" for index in range(20)]
+        planner = FetchPlanner()
+        for _ in range(10):
+            planner.record(planner.plan(hosts, 8),
+                           [page("wiki7.org", page_id) for page_id in range(8)])
+
+        plan = planner.plan(hosts, 8)
+
+        self.assertLessEqual(sum(plan.values()), 8 * FETCH_BUDGET_FACTOR)
+        self.assertEqual(max(plan, key=plan.__getitem__), "wiki7.org")
+        self.assertGreater(plan["wiki7.org"], max(pages for host, pages in plan.items()
+                                                  if host != "wiki7.org"))
+
+    def test_left_out_wikis_keep_their_shares(self) -> None:
+        """ Wikis left out of a search get their turn in the next one """
+
+        hosts = [f"wiki{index}.org" for index in range(50)]
+        planner = FetchPlanner()
+        plan = planner.plan(hosts, 8)
+        searched = [host for host, pages in plan.items() if pages]
+        planner.record(plan, [page(searched[0], page_id) for page_id in range(8)])
+
+        plan = planner.plan(hosts, 8)
+
+        # The wikis that found nothing make room for the ones that were not searched yet
+        left_out = [host for host in hosts if host not in searched]
+        self.assertTrue(any(plan[host] for host in left_out))
+        self.assertLessEqual(max(plan[host] for host in searched[1:]),
+                             min(plan[host] for host in left_out))
+
+    def test_forget(self) -> None:
+        """ Forgotten wikis start with an equal share again """
+
+        planner = FetchPlanner()
+        planner.record({"a.org": 12, "b.org": 12}, [page("a.org", 1)])
+        planner.forget(["a.org", "b.org"])
+
+        self.assertEqual(planner.plan(["a.org", "b.org"], 8), {"a.org": 12, "b.org": 12})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+""" Contains tests of collapsing the same pages found on multiple wikis """
+import unittest
+
+from data.WikiPage import WikiPage
+from utils.PageDeduplicator import PageDeduplicator
+
+
+# pylint: disable=too-many-arguments
+def page(host: str, wiki_id: str, page_id: int, title: str, url: str,
+         namespace: str = "") -> WikiPage:
+    """
+    Creates a page found in the wiki
+    :param host: Host of the wiki
+    :param wiki_id: Identity of the wiki
+    :param page_id: Id of the page
+    :param title: Title of the page
+    :param url: URL of the page
+    :param namespace: (optional) Namespace of the page
+    :return: Page
+    """
+
+    return WikiPage(host, host, wiki_id, page_id, title, title, namespace, url)
+
+
+class PageDeduplicatorTest(unittest.TestCase):
+    """ Tests which of the pages are the same """
+
+    def test_same_canonical_url(self) -> None:
+        """ Pages served from a mirror host or a path variant are the same """
+
+        first = page("en.wikipedia.org", "enwiki", 1, "Geralt of Rivia",
+                     "https://en.wikipedia.org/wiki/Geralt_of_Rivia")
+        mirror = page("en.m.wikipedia.org", "enwiki-mobile", 2, "Geralt of Rivia",
+                      "http://en.m.wikipedia.org/wiki/Geralt%20of%20Rivia")
+
+        deduplicator = PageDeduplicator(match_titles=False)
+
+        self.assertEqual(deduplicator.unique([first, mirror]), [first])
+        self.assertEqual(deduplicator.duplicates, 1)
+
+    def test_same_id_on_same_wiki(self) -> None:
+        """ Pages with the same id are the same only if they come from the same wiki """
+
+        first = page("wiki.org", "wiki", 1, "Ciri", "https://wiki.org/wiki/Ciri")
+        alias = page("alias.org", "wiki", 1, "Ciri", "https://alias.org/index.php?curid=1")
+        other = page("other.org", "other", 1, "Ciri", "https://other.org/wiki/Ciri")
+
+        self.assertEqual(PageDeduplicator(match_titles=False).unique([first, alias, other]),
+                         [first, other])
+
+    def test_matching_titles(self) -> None:
+        """ Pages with the same title in the same namespace are the same when matching titles """
+
+        first = page("wiki.org", "wiki", 1, "Kaer Morhen", "https://wiki.org/wiki/Kaer_Morhen")
+        same = page("other.org", "other", 7, "kaer_morhen", "https://other.org/wiki/kaer_morhen")
+        talk = page("other.org", "other", 8, "Kaer Morhen", "https://other.org/wiki/Talk:Kaer",
+                    namespace="Talk")
+
+        self.assertEqual(PageDeduplicator(match_titles=True).unique([first, same, talk]),
+                         [first, talk])
+        self.assertEqual(PageDeduplicator(match_titles=False).unique([first, same, talk]),
+                         [first, same, talk])
+
+    def test_keeps_state_between_calls(self) -> None:
+        """ Pages seen in an earlier call are dropped from the later ones """
+
+        first = page("wiki.org", "wiki", 1, "Ciri", "https://wiki.org/wiki/Ciri")
+        deduplicator = PageDeduplicator(match_titles=False)
+        deduplicator.unique([first])
+
+        self.assertEqual(deduplicator.unique([first]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
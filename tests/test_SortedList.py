@@ -0,0 +1,100 @@
+""" Contains tests of the sorted list of results """
+import random
+import unittest
+from typing import List
+
+from ulauncher.utils.fuzzy_search import get_score  # type: ignore
+
+from data.WikiPage import WikiPage
+from utils.SortedList import SortedList
+
+WORDS = ["Geralt", "of", "Rivia", "Ciri", "Witcher", "School", "Wolf", "sword", "silver",
+         "Kaer", "Morhen", "Yennefer", "Vengerberg", "the", "Trail", "Novigrad", "Oxenfurt"]
+QUERIES = ["g", "ge", "ger", "geralt", "witch", "the wolf", "sword of", "kaer mor", "xyz", " Ciri "]
+
+
+def page(page_id: int, title: str) -> WikiPage:
+    """
+    Creates a page found in the wiki
+    :param page_id: Id of the page
+    :param title: Title of the page
+    :return: Page with the title
+    """
+
+    return WikiPage("wiki.org", "Wiki", "wiki", page_id, title, title, "",
+                    f"https://wiki.org/wiki/{title.replace(' ', '_')}")
+
+
+def best_pages(query: str, pages: List[WikiPage], min_score: int, limit: int) -> List[WikiPage]:
+    """
+    Scores every page and sorts all of them, as the list did before it skipped any scoring
+    :param query: Text that was searched
+    :param pages: Pages to rank
+    :param min_score: Minimum score of the kept pages
+    :param limit: Maximum number of the kept pages
+    :return: Best pages, equally scored pages in the order they were given
+    """
+
+    query = query.lower().strip()
+    scored = [(get_score(query, item.title), item) for item in pages]
+    kept = [entry for entry in scored if entry[0] >= min_score]
+
+    return [item for _, item in sorted(kept, key=lambda entry: -entry[0])][:limit]
+
+
+class SortedListTest(unittest.TestCase):
+    """ Tests keeping the best scored pages """
+
+    def test_matches_full_scoring(self) -> None:
+        """ Skipping the pages that can't make it doesn't change the results """
+
+        generator = random.Random(42)
+        for case in range(200):
+            pages = [page(page_id, " ".join(generator.choices(WORDS, k=generator.randint(1, 4))))
+                     for page_id in range(generator.randint(0, 60))]
+            query = generator.choice(QUERIES)
+            min_score = generator.choice([0, 30, 60])
+            limit = generator.choice([1, 3, 9, 30])
+
+            with self.subTest(case=case, query=query, min_score=min_score, limit=limit):
+                results = SortedList[WikiPage](query, min_score=min_score, limit=limit)
+                results.extend(pages)
+
+                self.assertEqual([item.id for item in results],
+                                 [item.id for item in best_pages(query, pages, min_score, limit)])
+
+    def test_extending_in_parts(self) -> None:
+        """ Pages added in parts, as the wikis respond, end up the same as added at once """
+
+        generator = random.Random(7)
+        pages = [page(page_id, " ".join(generator.choices(WORDS, k=3))) for page_id in range(90)]
+
+        whole = SortedList[WikiPage]("wolf", min_score=30, limit=9)
+        whole.extend(pages)
+        parts = SortedList[WikiPage]("wolf", min_score=30, limit=9)
+        for start in range(0, len(pages), 20):
+            parts.extend(pages[start:start + 20])
+
+        self.assertEqual(list(parts), list(whole))
+
+    def test_equal_scores_keep_order(self) -> None:
+        """ Pages with the same score keep the order in which they were added """
+
+        pages = [page(page_id, "Geralt") for page_id in range(5)]
+
+        results = SortedList[WikiPage]("geralt", limit=3)
+        results.extend(pages)
+
+        self.assertEqual([item.id for item in results], [0, 1, 2])
+
+    def test_zero_limit(self) -> None:
+        """ A list without room keeps nothing """
+
+        results = SortedList[WikiPage]("geralt", limit=0)
+        results.extend([page(1, "Geralt")])
+
+        self.assertEqual(len(results), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+""" Contains tests of the local title index """
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from typing import cast, Any, Dict, List
+
+# noinspection PyPep8Naming
+from utils.API import API
+from utils.TitleIndex import TitleIndex, TIMESTAMP_FORMAT
+
+
+# pylint: disable=too-few-public-methods
+class CannedWiki:
+    """ Answers the queries of the title index with the listed pages and recent changes """
+
+    host = "wiki.org"
+    namespaces = {0: SimpleNamespace(id=0, has_content=True),
+                  1: SimpleNamespace(id=1, has_content=False),
+                  14: SimpleNamespace(id=14, has_content=True)}
+
+    pages: List[Dict[str, Any]]
+    changes: List[Dict[str, Any]]
+    queries: List[Dict[str, Any]]
+
+    def __init__(self, pages: List[Dict[str, Any]]) -> None:
+        self.pages = pages
+        self.changes = []
+        self.queries = []
+
+    def get(self, **kwargs) -> Dict[str, Any]:
+        r"""
+        Answers the query, listing the pages one at a time to follow the continuation
+        :param kwargs: \*\*kwargs: Query parameters
+        :return: Response of the API
+        """
+
+        self.queries.append(kwargs)
+        timestamp = time.strftime(TIMESTAMP_FORMAT, time.gmtime())
+
+        if kwargs["list"] == "recentchanges":
+            return {"curtimestamp": timestamp, "query": {"recentchanges": self.changes}}
+
+        pages = [page for page in self.pages if page["ns"] == kwargs["apnamespace"]]
+        offset = kwargs.get("apcontinue", 0)
+        result: Dict[str, Any] = {"curtimestamp": timestamp,
+                                  "query": {"allpages": pages[offset:offset + 1]}}
+        if offset + 1 < len(pages):
+            result["continue"] = {"apcontinue": offset + 1}
+
+        return result
+
+
+class TitleIndexTest(unittest.TestCase):
+    """ Tests building, refreshing and searching the title index """
+
+    def setUp(self) -> None:
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "wiki.org.tsv")
+        self.wiki = CannedWiki([
+            {"pageid": 1, "ns": 0, "title": "Geralt of Rivia"},
+            {"pageid": 2, "ns": 0, "title": "Geralt"},
+            {"pageid": 3, "ns": 0, "title": "Ciri"},
+            {"pageid": 4, "ns": 14, "title": "Category:Witchers"}
+        ])
+
+    def sync(self, index: TitleIndex) -> None:
+        """
+        Synchronizes the index with the canned wiki
+        :param index: Index to synchronize
+        """
+
+        index.sync(cast(API, self.wiki))
+
+    def test_build(self) -> None:
+        """ Titles of the content namespaces are searched by the prefix, ignoring case """
+
+        index = TitleIndex(self.path, max_pages=100, max_age=3600)
+        self.assertFalse(index.ready)
+
+        self.sync(index)
+
+        self.assertTrue(index.ready)
+        self.assertEqual(index.search("geralt", 10), [(2, 0, "Geralt"), (1, 0, "Geralt of Rivia")])
+        self.assertEqual(index.search(" CAT", 10), [(4, 14, "Category:Witchers")])
+        self.assertEqual(index.search("geralt", 1), [(2, 0, "Geralt")])
+        self.assertEqual(index.search("yennefer", 10), [])
+        self.assertEqual({query["apnamespace"] for query in self.wiki.queries}, {0, 14})
+
+    def test_refresh(self) -> None:
+        """ Created, deleted and moved pages are applied to the index and saved """
+
+        self.sync(TitleIndex(self.path, max_pages=100, max_age=3600))
+
+        index = TitleIndex(self.path, max_pages=100, max_age=3600)
+        self.assertTrue(index.ready)
+
+        self.wiki.queries.clear()
+        self.wiki.changes = [
+            {"type": "new", "pageid": 5, "ns": 0, "title": "Yennefer"},
+            {"type": "log", "logtype": "delete", "logaction": "delete", "ns": 0,
+             "title": "Geralt"},
+            {"type": "log", "logtype": "move", "ns": 0, "title": "Ciri",
+             "logparams": {"target_ns": 0, "target_title": "Cirilla"}}
+        ]
+        self.sync(index)
+
+        self.assertEqual([query["list"] for query in self.wiki.queries], ["recentchanges"])
+        self.assertEqual(index.search("geralt", 10), [(1, 0, "Geralt of Rivia")])
+        self.assertEqual(index.search("ci", 10), [(3, 0, "Cirilla")])
+        self.assertEqual(index.search("yen", 10), [(5, 0, "Yennefer")])
+
+        reloaded = TitleIndex(self.path, max_pages=100, max_age=3600)
+        self.assertEqual(reloaded.search("", 10), index.search("", 10))
+
+    def test_rebuild_when_too_old(self) -> None:
+        """ An index older than its maximum age is built again instead of being refreshed """
+
+        self.sync(TitleIndex(self.path, max_pages=100, max_age=3600))
+
+        index = TitleIndex(self.path, max_pages=100, max_age=-1)
+        self.wiki.queries.clear()
+        self.sync(index)
+
+        self.assertEqual({query["list"] for query in self.wiki.queries}, {"allpages"})
+
+    def test_too_many_pages(self) -> None:
+        """ A wiki with more pages than allowed is not indexed """
+
+        index = TitleIndex(self.path, max_pages=2, max_age=3600)
+        with self.assertLogs("utils.TitleIndex", "WARNING"):
+            self.sync(index)
+
+        self.assertFalse(index.ready)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+""" Contains tests of the archive of the recorded traffic """
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from typing import Any, Dict
+
+from requests import PreparedRequest, Request, Response
+
+from utils.TrafficArchive import TrafficArchive
+
+
+def request(method: str, url: str, data: Dict[str, Any] | None = None) -> PreparedRequest:
+    """
+    Prepares a request as the session would send it
+    :param method: HTTP method
+    :param url: URL with the query string
+    :param data: (optional) Form data
+    :return: Prepared request
+    """
+
+    return Request(method, url, data=data).prepare()
+
+
+def response(body: bytes) -> Response:
+    """
+    Creates a received response with the body already read
+    :param body: Body of the response
+    :return: Response
+    """
+
+    result = Response()
+    result.status_code = 200
+    result.reason = "OK"
+    result.headers["Content-Type"] = "application/json"
+    result.headers["Content-Encoding"] = "gzip"
+    # pylint: disable=protected-access
+    result._content = body
+
+    return result
+
+
+class TrafficArchiveTest(unittest.TestCase):
+    """ Tests matching the requests to the recorded responses """
+
+    def test_key_ignores_parameter_order(self) -> None:
+        """ The same parameters in another order identify the same request """
+
+        self.assertEqual(
+            TrafficArchive.key(request("GET", "https://wiki.org/api.php?format=json&action=query")),
+            TrafficArchive.key(request("GET", "https://wiki.org/api.php?action=query&format=json"))
+        )
+        self.assertEqual(
+            TrafficArchive.key(request("POST", "https://wiki.org/api.php",
+                                       {"list": "search", "srsearch": "ciri"})),
+            TrafficArchive.key(request("POST", "https://wiki.org/api.php",
+                                       {"srsearch": "ciri", "list": "search"}))
+        )
+
+    def test_key_tells_requests_apart(self) -> None:
+        """ Requests differing in the method, address or parameters have different keys """
+
+        keys = {TrafficArchive.key(prepared) for prepared in [
+            request("GET", "https://wiki.org/api.php?action=query"),
+            request("POST", "https://wiki.org/api.php", {"action": "query"}),
+            request("GET", "http://wiki.org/api.php?action=query"),
+            request("GET", "https://other.org/api.php?action=query"),
+            request("GET", "https://wiki.org/w/api.php?action=query"),
+            request("GET", "https://wiki.org/api.php?action=query&list=search"),
+            request("GET", "https://wiki.org/api.php?action=query&list=")
+        ]}
+
+        self.assertEqual(len(keys), 7)
+
+    def test_replays_saved_responses(self) -> None:
+        """ Saved responses are served in the recorded order, repeating the last one """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traffic.json.gz")
+            recorded = TrafficArchive(path, save_interval=3600)
+            sent = request("GET", "https://wiki.org/api.php?action=query")
+            recorded.add(sent, response(b"first \xff"), 0.123456)
+            recorded.add(sent, response(b"second"), 0.2)
+            recorded.save(force=True)
+
+            archive = TrafficArchive(path, save_interval=3600)
+            archive.load()
+
+            replayed = [archive.get(request("GET", "https://wiki.org/api.php?action=query"))
+                        for _ in range(3)]
+            self.assertEqual([entry and entry["body"] for entry in replayed],
+                             [b"first \xff", b"second", b"second"])
+            self.assertEqual([entry and entry["latency"] for entry in replayed],
+                             [0.1235, 0.2, 0.2])
+            self.assertEqual(replayed[0] and replayed[0]["headers"],
+                             {"Content-Type": "application/json"})
+            self.assertIsNone(archive.get(request("GET", "https://wiki.org/api.php")))
+            self.assertFalse([name for name in os.listdir(directory) if name.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
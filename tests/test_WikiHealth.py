@@ -0,0 +1,109 @@
+""" Contains tests of the health of a wiki """
+import unittest
+from unittest import mock
+
+from data import SEARCH_TIMEOUT, HEALTH_MIN_SAMPLES, HEALTH_MAX_ERROR_RATE, HEALTH_QUARANTINE, \
+    HEALTH_MAX_QUARANTINE, HEALTH_DEADLINE_FACTOR, HEALTH_MIN_DEADLINE
+from utils.WikiHealth import WikiHealth
+
+
+class WikiHealthTest(unittest.TestCase):
+    """ Tests the deadlines and the quarantine of a wiki """
+
+    def setUp(self) -> None:
+        self.now = 1000.0
+        patcher = mock.patch("utils.WikiHealth.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_quarantined_before_enough_samples(self) -> None:
+        """ A few failures of a new wiki don't quarantine it """
+
+        health = WikiHealth()
+        for _ in range(HEALTH_MIN_SAMPLES - 1):
+            health.record_failure()
+
+        self.assertFalse(health.quarantined)
+
+    def test_quarantined_at_error_rate(self) -> None:
+        """ The wiki is quarantined once its error rate reaches the threshold """
+
+        samples = HEALTH_MIN_SAMPLES * 2
+        failures = int(samples * HEALTH_MAX_ERROR_RATE)
+
+        health = WikiHealth()
+        for _ in range(samples - failures):
+            health.record_success(0.1)
+        for _ in range(failures - 1):
+            health.record_failure()
+        self.assertFalse(health.quarantined)
+
+        health.record_failure()
+        self.assertTrue(health.quarantined)
+
+    def test_probe_after_quarantine(self) -> None:
+        """ The wiki is probed once per expired quarantine and released by a successful probe """
+
+        health = WikiHealth()
+        for _ in range(HEALTH_MIN_SAMPLES):
+            health.record_failure()
+
+        self.assertFalse(health.start_probe())
+
+        self.now += HEALTH_QUARANTINE
+        self.assertTrue(health.start_probe())
+        self.assertFalse(health.start_probe())
+
+        health.finish_probe(True)
+        self.assertFalse(health.quarantined)
+
+        # The old failures don't count against the released wiki
+        health.record_failure()
+        self.assertFalse(health.quarantined)
+
+    def test_failed_probe_extends_quarantine(self) -> None:
+        """ The quarantine doubles with every failed probe, up to its maximum """
+
+        health = WikiHealth()
+        for _ in range(HEALTH_MIN_SAMPLES):
+            health.record_failure()
+
+        quarantine = HEALTH_QUARANTINE
+        while quarantine < HEALTH_MAX_QUARANTINE:
+            self.now += quarantine
+            self.assertTrue(health.start_probe())
+            health.finish_probe(False)
+            quarantine = min(HEALTH_MAX_QUARANTINE, quarantine * 2)
+
+            self.now += quarantine - 1
+            self.assertFalse(health.start_probe())
+            self.now += 1
+
+        self.assertTrue(health.start_probe())
+        health.finish_probe(False)
+        self.now += HEALTH_MAX_QUARANTINE
+        self.assertTrue(health.start_probe())
+
+    def test_deadline(self) -> None:
+        """ The deadline follows the latency of the wiki within its bounds """
+
+        health = WikiHealth()
+        self.assertEqual(health.deadline, SEARCH_TIMEOUT)
+
+        for _ in range(HEALTH_MIN_SAMPLES):
+            health.record_success(0.6)
+        self.assertAlmostEqual(health.deadline, 0.6 * HEALTH_DEADLINE_FACTOR)
+
+        fast = WikiHealth()
+        for _ in range(HEALTH_MIN_SAMPLES):
+            fast.record_success(0.01)
+        self.assertEqual(fast.deadline, HEALTH_MIN_DEADLINE)
+
+        slow = WikiHealth()
+        for _ in range(HEALTH_MIN_SAMPLES):
+            slow.record_success(SEARCH_TIMEOUT)
+        self.assertEqual(slow.deadline, SEARCH_TIMEOUT)
+
+
+if __name__ == "__main__":
+    unittest.main()
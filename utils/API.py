@@ -1,9 +1,22 @@
 """ Contains class extending mwclient's Site class to add more functionality """
-from typing import Dict
+import json
+from typing import cast, Any, Collection, Dict, List
+from urllib.parse import quote
 
 from mwclient import Site
+from mwclient.errors import APIError
 
+from data import RESPONSE_CHUNK_SIZE
 from data.WikiNamespace import WikiNamespace
+from data.WikiPage import TITLE_SAFE_CHARACTERS, SPACE_REPLACEMENT
+from utils.Metrics import metrics
+
+# Parameters selecting the query modules, values of the combined queries are joined
+MODULE_PARAMETERS = ("prop", "list", "meta")
+
+
+class ResponseTooLargeError(ValueError):
+    """ Raised when a response of the API exceeds the allowed size """
 
 
 # noinspection PyAttributeOutsideInit
@@ -33,15 +46,23 @@ class API(Site):
         )
 
         # Extract site info
-        self.site = meta["query"]["general"]
-        self.namespaces = {
-            namespace["id"]: WikiNamespace(
-                namespace["id"],
-                "Main" if not namespace["*"] and namespace["id"] == 0 else namespace["*"],
-                "content" in namespace
-            )
-            for namespace in meta["query"]["namespaces"].values()
-        }
+        self.load_site_query(meta["query"])
+
+        # User info
+        userinfo = meta["query"]["userinfo"]
+        self.username = userinfo["name"]
+        self.groups = userinfo.get("groups", [])
+        self.rights = userinfo.get("rights", [])
+
+    def load_site_info(self, site: Dict[str, Any], namespaces: List[WikiNamespace]) -> None:
+        """
+        Initializes the site from already known site info, without making any requests
+        :param site: General site info, as returned by the `siteinfo` query
+        :param namespaces: Namespaces of the site
+        """
+
+        self.site = site
+        self.namespaces = {namespace.id: namespace for namespace in namespaces}
         self.writeapi = "writeapi" in self.site
 
         self.version = self.version_tuple_from_generator(self.site["generator"])
@@ -49,19 +70,171 @@ class API(Site):
         # Require MediaWiki version >= 1.16
         self.require(1, 16)
 
-        # User info
-        userinfo = meta["query"]["userinfo"]
-        self.username = userinfo["name"]
-        self.groups = userinfo.get("groups", [])
-        self.rights = userinfo.get("rights", [])
         self.initialized = True
 
+    def load_site_query(self, query: Dict[str, Any]) -> None:
+        """
+        Initializes the site from a response of the `siteinfo` query, without making any requests
+        :param query: Query part of the response, with the general site info and the namespaces
+        """
+
+        self.load_site_info(query["general"], [
+            WikiNamespace(
+                namespace["id"],
+                "Main" if not namespace["*"] and namespace["id"] == 0 else namespace["*"],
+                "content" in namespace
+            )
+            for namespace in query["namespaces"].values()
+        ])
+
+    @staticmethod
+    def _compatible(batch: Dict[str, Any], query: Dict[str, Any]) -> bool:
+        """
+        Checks whether the query can be sent in the same request as the batch
+        :param batch: Parameters of the combined queries
+        :param query: Parameters of the query to add
+        :return: True if no parameter, except the module parameters, has a different value
+        """
+
+        return all(key in MODULE_PARAMETERS or key not in batch or batch[key] == value
+                   for key, value in query.items())
+
+    def batch_query(self, *queries: Dict[str, Any], fields: Collection[str],
+                    max_bytes: int) -> List[Dict[str, Any]]:
+        """
+        Combines the queries into as few `action=query` requests as possible,
+        e.g. a generator with its props and a list module are sent together
+        :param queries: Parameters of the queries
+        :param fields: Fields of the pages to decode, see :meth:`query_pages`
+        :param max_bytes: Maximum size of each response, see :meth:`query_pages`
+        :return: Response for each query, combined queries share the same response
+        """
+
+        batches: List[Dict[str, Any]] = []
+        owners: List[int] = []
+
+        for query in queries:
+            index = next((index for index, batch in enumerate(batches)
+                          if self._compatible(batch, query)), len(batches))
+            if index == len(batches):
+                batches.append({})
+
+            batch = batches[index]
+            for key, value in query.items():
+                if key in MODULE_PARAMETERS:
+                    modules = batch.setdefault(key, [])
+                    modules += [module for module in (value if isinstance(value, list) else
+                                                      [value]) if module not in modules]
+                else:
+                    batch[key] = value
+
+            owners.append(index)
+
+        responses = [self.query_pages(fields, max_bytes, **batch) for batch in batches]
+        return [responses[index] for index in owners]
+
+    def query_pages(self, fields: Collection[str], max_bytes: int, **kwargs) -> Dict[str, Any]:
+        r"""
+        Sends an `action=query` request without any retries, reading the response in parts
+        up to `max_bytes`, and keeps only the listed fields of the pages.
+        Unlike mwclient, the response is decoded into plain dicts,
+        it's several times faster than decoding into ordered dicts
+        :param fields: Fields of the pages to keep
+        :param max_bytes: Maximum size (in bytes) of the decompressed response
+        :param kwargs: \*\*kwargs: Query parameters
+        :return: Response of the API
+        :raises APIError: If the API returned an error
+        :raises ResponseTooLargeError: If the response is larger than `max_bytes`
+        :raises ValueError: If the response is not valid JSON
+        """
+
+        data = self._query_string(action="query", format="json", **{"continue": ""},
+                                  **self._serialize(kwargs))
+        url = f"{self.scheme}://{self.host}{self.path}api{self.ext}"
+
+        with metrics.span("api", self.host):
+            with metrics.span("http", self.host):
+                res = self.connection.request("GET", url, params=data, stream=True,
+                                              **self.requests)
+                with res:
+                    res.raise_for_status()
+
+                    # Stop downloading a bloated response instead of keeping all of it in memory
+                    body = bytearray()
+                    for chunk in res.iter_content(RESPONSE_CHUNK_SIZE):
+                        body += chunk
+                        if len(body) > max_bytes:
+                            metrics.count("oversized", self.host)
+                            raise ResponseTooLargeError(
+                                f"Response is larger than {max_bytes} bytes"
+                            )
+
+            result = json.loads(body)
+
+            # Drop the unused fields right away, the raw pages are kept until they are processed
+            for page in ((result.get("query") or {}).get("pages") or {}).values():
+                for field in [field for field in page if field not in fields]:
+                    del page[field]
+
+        if "error" in result:
+            raise APIError(result["error"].get("code"), result["error"].get("info"), kwargs)
+
+        return result
+
+    @property
+    def wiki_id(self) -> str:
+        """
+        Returns identity of the wiki, the same for the wiki served from several hosts
+        and different for wikis with the same name, like Wikipedias in other languages
+        :return: Database name of the wiki, or its server if the wiki doesn't report it
+        """
+
+        return cast(str, self.site.get("wikiid") or self.site.get("server") or self.host)
+
+    def page_url(self, title: str) -> str:
+        """
+        Builds the URL of the page, without making any requests
+        :param title: Title of the page
+        :return: Full URL of the page
+        """
+
+        server = cast(str, self.site["server"])
+        if server.startswith("//"):
+            server = f"{self.scheme}:{server}"
+
+        path = quote(title, safe=TITLE_SAFE_CHARACTERS).replace(" ", SPACE_REPLACEMENT)
+        return server + cast(str, self.site["articlepath"]).replace("$1", path)
+
     # pylint: disable=keyword-arg-before-vararg
     def api(self, action, http_method="POST", *args, **kwargs):
-        for key, value in kwargs.items():
+        return super().api(action, http_method, *args, **self._serialize(kwargs))
+
+    @staticmethod
+    def _serialize(parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Converts lists and booleans into the format expected by the API
+        :param parameters: Parameters of the request
+        :return: Serialized parameters
+        """
+
+        serialized = dict(parameters)
+        for key, value in parameters.items():
+            # Keep mwclient's own options untouched, only API parameters are serialized
+            if key == "retry_on_error":
+                continue
             if isinstance(value, list):
-                kwargs[key] = "|".join(map(str, value))
+                serialized[key] = "|".join(map(str, value))
             if isinstance(value, bool):
-                kwargs[key] = "true" if value else "false"
+                serialized[key] = "true" if value else "false"
+
+        return serialized
+
+    # pylint: disable=keyword-arg-before-vararg
+    def raw_api(self, action, http_method="POST", *args, **kwargs):
+        with metrics.span("api", self.host):
+            return super().raw_api(action, http_method, *args, **kwargs)
 
-        return super().api(action, http_method, *args, **kwargs)
+    # pylint: disable=too-many-arguments
+    def raw_call(self, script, data, files=None, retry_on_error=True, http_method="POST"):
+        with metrics.span("http", self.host):
+            return super().raw_call(script, data, files, retry_on_error, http_method)
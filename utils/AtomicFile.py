@@ -0,0 +1,41 @@
+""" Contains function for writing files that are never left half written """
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from typing import Any, Callable, IO
+
+logger = logging.getLogger(__name__)
+
+
+def write_atomically(path: str, write: Callable[[IO[str]], Any], description: str,
+                     opener: Callable[..., IO[str]] = open) -> bool:
+    """
+    Writes the file to a unique temporary file next to it and replaces the file with it,
+    so neither the readers nor the concurrent writers ever see a partially written file
+    :param path: Path of the file
+    :param write: Writes the content to the opened text file
+    :param description: What the file contains, used in the warning if it can't be written
+    :param opener: (optional) Opens the temporary file for writing, e.g. `gzip.open`
+    :return: True if the file was written
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    temporary = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=os.path.basename(path) + ".",
+                                         suffix=".tmp", delete=False) as file:
+            temporary = file.name
+
+        with opener(temporary, "wt", encoding="utf-8") as file:
+            write(file)
+        os.replace(temporary, path)
+        return True
+    except OSError as error:
+        logger.warning("Unable to save %s: %s", description, error)
+        return False
+    finally:
+        if temporary and os.path.exists(temporary):
+            os.remove(temporary)
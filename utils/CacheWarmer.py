@@ -0,0 +1,77 @@
+""" Contains class for refreshing cached results of the frequent queries in the background """
+from __future__ import annotations
+
+import logging
+from threading import Event, Thread
+from typing import Callable
+
+from data import WARMUP_STARTUP_DELAY, WARMUP_INTERVAL, WARMUP_MAX_QUERIES, \
+    WARMUP_REQUEST_BUDGET, WARMUP_QUERY_DELAY, WARMUP_IDLE_TIME
+from utils.QueryStats import QueryStats
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Periodically searches the most frequent queries whose cached results are missing or stale.
+    Queries are searched one at a time, with a pause between them and a limited number of
+    requests per run, and the run stops as soon as the user starts typing
+    """
+
+    _queries: QueryStats
+    # Searches the query and stores the results, returns the number of requests sent
+    _warm: Callable[[str], int]
+    # Returns the time (in seconds) since the last search of the user
+    _idle_time: Callable[[], float]
+    _wake: Event
+    _stopped: bool
+
+    def __init__(self, queries: QueryStats, warm: Callable[[str], int],
+                 idle_time: Callable[[], float]) -> None:
+        self._queries = queries
+        self._warm = warm
+        self._idle_time = idle_time
+        self._wake = Event()
+        self._stopped = False
+
+    def start(self) -> None:
+        """ Starts warming the cache in a background thread """
+
+        Thread(target=self._run, name="wiki-warmup", daemon=True).start()
+
+    def stop(self) -> None:
+        """ Stops warming the cache, the current query is finished first """
+
+        self._stopped = True
+        self._wake.set()
+
+    def _run(self) -> None:
+        """ Warms the cache shortly after the startup and then on every interval """
+
+        self._wake.wait(WARMUP_STARTUP_DELAY)
+
+        while not self._stopped:
+            try:
+                self.warm()
+            except Exception as error:  # pylint: disable=broad-except
+                logger.warning("Unable to warm the cache: %s", error)
+
+            self._queries.save()
+            self._wake.wait(WARMUP_INTERVAL)
+
+    def warm(self) -> None:
+        """ Searches the most frequent queries until the request budget runs out """
+
+        budget = WARMUP_REQUEST_BUDGET
+        for query in self._queries.top(WARMUP_MAX_QUERIES):
+            # Never compete with the searches of the user, try again on the next run
+            if budget <= 0 or self._stopped or self._idle_time() < WARMUP_IDLE_TIME:
+                return
+
+            sent = self._warm(query)
+            budget -= sent
+
+            if sent:
+                logger.debug("Warmed the cache for %s with %s requests", query, sent)
+                self._wake.wait(WARMUP_QUERY_DELAY)
@@ -0,0 +1,95 @@
+""" Contains class for persisting resolved API endpoints between restarts """
+from __future__ import annotations
+
+import json
+import time
+from threading import Lock
+from typing import Any, Dict, Tuple
+
+from data.WikiNamespace import WikiNamespace
+from utils.API import API
+from utils.AtomicFile import write_atomically
+
+
+class EndpointCache:
+    """
+    Stores resolved API endpoints along with their site info in a JSON file,
+    so they can be rebuilt on startup without making any requests
+    """
+
+    _path: str
+    _ttl: float
+    _entries: Dict[str, Dict[str, Any]]
+    _lock: Lock
+
+    def __init__(self, path: str, ttl: float) -> None:
+        self._path = path
+        self._ttl = ttl
+        self._entries = {}
+        self._lock = Lock()
+
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                self._entries = json.load(file)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, netloc: str, **kwargs) -> Tuple[API | None, bool]:
+        r"""
+        Rebuilds the API object for the provided location
+        :param netloc: Network location of the wiki, as provided by the user
+        :param kwargs: \*\*kwargs: Additional arguments passed to the :class:`API` constructor
+        :return: API object or None if not cached, and whether the entry should be revalidated
+        """
+
+        with self._lock:
+            entry = self._entries.get(netloc)
+
+        if not entry:
+            return None, False
+
+        api = API(
+            host=entry["host"],
+            scheme=entry["scheme"],
+            path=entry["path"],
+            do_init=False,
+            **kwargs
+        )
+
+        try:
+            api.load_site_info(entry["site"], [
+                WikiNamespace(namespace_id, name, has_content)
+                for namespace_id, name, has_content in entry["namespaces"]
+            ])
+        except Exception:  # pylint: disable=broad-except
+            # Corrupted or outdated entry, the endpoint will be resolved again
+            return None, False
+
+        return api, time.time() - entry["timestamp"] > self._ttl
+
+    def put(self, netloc: str, api: API) -> None:
+        """
+        Stores the API object and saves the cache to the disk
+        :param netloc: Network location of the wiki, as provided by the user
+        :param api: Initialized API object
+        """
+
+        with self._lock:
+            self._entries[netloc] = {
+                "host": api.host,
+                "scheme": api.scheme,
+                "path": api.path,
+                "site": api.site,
+                "namespaces": [
+                    [namespace.id, namespace.name, namespace.has_content]
+                    for namespace in api.namespaces.values()
+                ],
+                "timestamp": time.time()
+            }
+            self._save()
+
+    def _save(self) -> None:
+        """ Writes the entries to the disk """
+
+        write_atomically(self._path, lambda file: json.dump(self._entries, file),
+                         "endpoint cache")
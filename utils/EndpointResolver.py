@@ -0,0 +1,110 @@
+""" Contains class for resolving the API endpoints of the configured wikis """
+from __future__ import annotations
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Dict, Tuple
+# noinspection PyPep8Naming
+from urllib.parse import ParseResult as URL
+
+from data import SEARCH_MAX_WORKERS, CACHE_DIR, ENDPOINT_CACHE_TTL, HTTP_CONNECT_TIMEOUT, \
+    HTTP_READ_TIMEOUT
+# noinspection PyPep8Naming
+from utils.API import API
+from utils.EndpointCache import EndpointCache
+from utils.Metrics import metrics
+from utils.Session import Session
+from utils.WikiDetector import WikiDetector
+
+
+class EndpointResolver:
+    """
+    Finds the API endpoints of the wikis in the background and keeps the resolved ones
+    on the disk, so the wikis are ready right away on the next start
+    """
+
+    _session: Session
+    _detector: WikiDetector
+    _endpoints: EndpointCache
+    # Discovering slow wikis must not hold up the searches of the ready ones
+    _executor: ThreadPoolExecutor
+    # Lookups in progress by the network location, joined instead of being started again
+    _lookups: Dict[str, Future]
+    _lock: Lock
+
+    def __init__(self, session: Session) -> None:
+        """
+        :param session: Session used for all requests
+        """
+
+        self._session = session
+        self._detector = WikiDetector(session, self.api_options)
+        self._endpoints = EndpointCache(os.path.join(CACHE_DIR, "endpoints.json"),
+                                        ENDPOINT_CACHE_TTL)
+        self._executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS,
+                                            thread_name_prefix="wiki-discovery")
+        self._lookups = {}
+        self._lock = Lock()
+
+    def api_options(self) -> Dict[str, Any]:
+        """
+        Returns options shared by all MediaWiki API objects
+        :return: Keyword arguments for the :class:`API` constructor
+        """
+
+        return {
+            # Share connections between all wikis, the session also sets the user agent
+            "pool": self._session,
+            "force_login": False,
+            # Let the session negotiate the compression, mwclient only asks for gzip
+            "compress": False,
+            "reqs": {"timeout": (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)}
+        }
+
+    def cached(self, netloc: str) -> Tuple[API | None, bool]:
+        """
+        Rebuilds the API endpoint resolved before, without making any requests
+        :param netloc: Network location of the wiki, as provided by the user
+        :return: MediaWiki API or None if not cached, and whether it should be looked up again
+        """
+
+        return self._endpoints.get(netloc, **self.api_options())
+
+    def lookup(self, url: URL) -> Future:
+        """
+        Resolves the API endpoint in the background,
+        joining the lookup of the same location if it's already in progress
+        :param url: URL pointing to the MediaWiki site
+        :return: Future resolved with the MediaWiki API or None if not resolved
+        """
+
+        with self._lock:
+            lookup = self._lookups.get(url.netloc)
+            if lookup:
+                return lookup
+
+            lookup = self._lookups[url.netloc] = self._executor.submit(self._detect, url)
+
+        def finish(_: Future) -> None:
+            with self._lock:
+                if self._lookups.get(url.netloc) is lookup:
+                    del self._lookups[url.netloc]
+
+        lookup.add_done_callback(finish)
+        return lookup
+
+    def _detect(self, url: URL) -> API | None:
+        """
+        Resolves MediaWiki API from the provided url and keeps it for the next start
+        :param url: URL pointing to the MediaWiki site
+        :return: MediaWiki API or None if not resolved
+        """
+
+        with metrics.span("discovery", url.netloc):
+            endpoint = self._detector.detect(url)
+
+        if endpoint:
+            self._endpoints.put(url.netloc, endpoint)
+
+        return endpoint
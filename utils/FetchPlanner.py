@@ -0,0 +1,96 @@
+""" Contains class for deciding how many pages to fetch from each wiki """
+from __future__ import annotations
+
+import math
+from collections import Counter
+from heapq import heapify, heapreplace
+from threading import Lock
+from typing import Dict, Iterable, List
+
+from data import FETCH_BUDGET_FACTOR, FETCH_MIN_LIMIT, FETCH_MAX_LIMIT, FETCH_SHARE_DECAY, \
+    FETCH_SHARE_SMOOTHING
+from data.WikiPage import WikiPage
+
+
+class FetchPlanner:
+    """
+    Splits the candidates fetched for a search between the wikis by their shares of the recent
+    top results, wikis that rarely make it to the top are asked for a few pages only.
+    The pages of all wikis together never exceed the budget, with many wikis the least
+    contributing ones are left out of the search
+    """
+
+    # Moving average of the fraction of the top results coming from the wiki, by its host
+    _shares: Dict[str, float]
+    _lock: Lock
+
+    def __init__(self) -> None:
+        self._shares = {}
+        self._lock = Lock()
+
+    def plan(self, hosts: List[str], limit: int) -> Dict[str, int]:
+        """
+        Decides how many pages to request from each wiki
+        :param hosts: Hosts of the searched wikis
+        :param limit: Number of the results shown
+        :return: Number of pages to request, by the host of the wiki,
+        wikis with no pages should not be searched
+        """
+
+        if not hosts:
+            return {}
+
+        budget = limit * FETCH_BUDGET_FACTOR
+
+        with self._lock:
+            shares = {host: self._shares.get(host, 1 / len(hosts)) + FETCH_SHARE_SMOOTHING
+                      for host in hosts}
+
+        # Part of the budget each wiki deserves by its share
+        total = sum(shares.values())
+        parts = {host: budget * share / total for host, share in shares.items()}
+        plan = {host: min(FETCH_MAX_LIMIT, max(FETCH_MIN_LIMIT, math.ceil(part)))
+                for host, part in parts.items()}
+
+        # The bounds may exceed the budget, take the excess back from the allocations furthest
+        # above their parts, of the equal ones from the wiki with the lowest share first
+        allocations = [(parts[host] - pages, shares[host], host) for host, pages in plan.items()]
+        heapify(allocations)
+        for _ in range(sum(plan.values()) - budget):
+            _, share, host = allocations[0]
+            plan[host] -= 1
+            heapreplace(allocations, (parts[host] - plan[host], share, host))
+
+        return plan
+
+    def record(self, plan: Dict[str, int], pages: Iterable[WikiPage]) -> None:
+        """
+        Updates the shares of the searched wikis with the results of a search,
+        the wikis left out by the plan keep their shares
+        :param plan: Number of pages requested, by the host of the wiki
+        :param pages: Results shown for the search
+        """
+
+        counts = Counter(page.host for page in pages)
+        total = sum(counts.values())
+
+        # A search without results says nothing about the wikis
+        if not total:
+            return
+
+        with self._lock:
+            for host, limit in plan.items():
+                if not limit:
+                    continue
+                share = self._shares.get(host, 1 / len(plan))
+                self._shares[host] = share + FETCH_SHARE_DECAY * (counts[host] / total - share)
+
+    def forget(self, hosts: Iterable[str]) -> None:
+        """
+        Drops the shares of the wikis removed from the configuration
+        :param hosts: Hosts of the removed wikis
+        """
+
+        with self._lock:
+            for host in hosts:
+                self._shares.pop(host, None)
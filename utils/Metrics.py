@@ -0,0 +1,141 @@
+""" Contains class for measuring time spent in the individual phases of the search """
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Tuple
+
+from data import CACHE_DIR, METRICS_SAMPLES, METRICS_SAVE_INTERVAL
+from utils.AtomicFile import write_atomically
+from utils.Timing import Timing
+
+# Phase, or counter, name and host of the wiki (empty if the phase doesn't belong to any wiki)
+MetricKey = Tuple[str, str]
+
+
+class Metrics:
+    """
+    Collects timings of the search phases and counters of the cache hits, both in total and
+    per wiki, and periodically writes their summary to a JSON file
+    """
+
+    _path: str
+    _save_interval: float
+    _samples: int
+    _timings: Dict[MetricKey, Timing]
+    _counters: Dict[MetricKey, int]
+    _saved_at: float
+    _lock: Lock
+
+    def __init__(self, path: str, save_interval: float, samples: int) -> None:
+        self._path = path
+        self._save_interval = save_interval
+        self._samples = samples
+        self._timings = {}
+        self._counters = {}
+        self._saved_at = time.time()
+        self._lock = Lock()
+
+    @contextmanager
+    def span(self, name: str, wiki: str = "") -> Iterator[None]:
+        """
+        Measures the time spent in the block, the phase counts as failed if the block raises
+        :param name: Name of the phase
+        :param wiki: (optional) Host of the wiki the phase belongs to
+        """
+
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, wiki, error)
+
+    def record(self, name: str, duration: float, wiki: str = "", error: bool = False) -> None:
+        """
+        Records duration of a phase measured outside a span
+        :param name: Name of the phase
+        :param duration: Duration (in seconds)
+        :param wiki: (optional) Host of the wiki the phase belongs to
+        :param error: (optional) Whether the phase failed
+        """
+
+        with self._lock:
+            timing = self._timings.get((name, wiki))
+            if not timing:
+                timing = self._timings[(name, wiki)] = Timing(self._samples)
+            timing.add(duration, error)
+
+    def count(self, name: str, wiki: str = "") -> None:
+        """
+        Increments a counter
+        :param name: Name of the counter
+        :param wiki: (optional) Host of the wiki the counter belongs to
+        """
+
+        with self._lock:
+            self._counters[(name, wiki)] = self._counters.get((name, wiki), 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarizes the collected metrics
+        :return: Timings and counters of the phases, and the same grouped by the wikis
+        """
+
+        summary: Dict[str, Any] = {"phases": {}, "counters": {}, "wikis": {}}
+
+        with self._lock:
+            for (name, wiki), timing in self._timings.items():
+                group = summary["wikis"].setdefault(wiki, {}) if wiki else summary["phases"]
+                group[name] = timing.to_dict()
+
+            for (name, wiki), value in self._counters.items():
+                group = summary["wikis"].setdefault(wiki, {}) if wiki else summary["counters"]
+                group[name] = value
+
+        # API calls consist of the HTTP request and decoding of the response
+        for phases in summary["wikis"].values():
+            if "api" in phases and "http" in phases:
+                phases["decode_mean_ms"] = round(
+                    max(0, phases["api"]["mean_ms"] - phases["http"]["mean_ms"]), 2
+                )
+
+        return summary
+
+    def slowest_wikis(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Returns the wikis that took the longest to search
+        :param limit: Maximum number of wikis to return
+        :return: Hosts of the wikis and their search timings, from the slowest
+        """
+
+        summary = self.summary()
+        searches = [(wiki, phases["search"]) for wiki, phases in summary["wikis"].items()
+                    if "search" in phases]
+
+        return sorted(searches, key=lambda entry: entry[1]["p95_ms"], reverse=True)[:limit]
+
+    def save(self, force: bool = False) -> None:
+        """
+        Writes the summary to the disk
+        :param force: (optional) Whether to write even if the file was saved recently
+        """
+
+        with self._lock:
+            if not force and time.time() - self._saved_at < self._save_interval:
+                return
+
+            self._saved_at = saved_at = time.time()
+
+        summary = {"saved_at": saved_at, **self.summary()}
+        write_atomically(self._path, lambda file: json.dump(summary, file, indent=2), "metrics")
+
+
+# Shared by everything that takes part in the search, like the logging
+metrics = Metrics(os.path.join(CACHE_DIR, "metrics.json"), METRICS_SAVE_INTERVAL, METRICS_SAMPLES)
@@ -0,0 +1,84 @@
+""" Contains class for collapsing the same pages found on multiple wikis """
+from __future__ import annotations
+
+import re
+from typing import List, Set
+from urllib.parse import unquote, urlsplit
+
+from data.WikiPage import WikiPage
+
+# Host prefixes of the same site, like the mobile version of Wikipedia
+MIRROR_HOST_PREFIX_REGEX = re.compile(r"^(?:www|m)\.|(?<=\.)m\.")
+# Characters MediaWiki treats as the same in titles
+TITLE_SEPARATOR_REGEX = re.compile(r"[\s_]+")
+
+
+# pylint: disable=too-few-public-methods
+class PageDeduplicator:
+    """
+    Keeps only the first of the pages that are the same, pages coming earlier win.
+    Pages are the same if they have the same canonical URL, or the same id on the same wiki
+    (reported with the same wiki id, even when served from another host). When matching titles,
+    pages with the same title in the same namespace are the same as well.
+    Only hashes of the fingerprints are kept, so a lookup costs a single set operation
+    """
+
+    _match_titles: bool
+    _seen: Set[int]
+    duplicates: int
+
+    def __init__(self, match_titles: bool) -> None:
+        self._match_titles = match_titles
+        self._seen = set()
+        self.duplicates = 0
+
+    @staticmethod
+    def _canonical_url(url: str) -> str:
+        """
+        Normalizes the URL, so the same page served from another host or path variant matches
+        :param url: URL of the page
+        :return: URL without the scheme, mirror host prefixes and encoding
+        """
+
+        parts = urlsplit(url)
+        host = MIRROR_HOST_PREFIX_REGEX.sub("", parts.netloc.lower())
+        path = TITLE_SEPARATOR_REGEX.sub(" ", unquote(parts.path))
+
+        return f"{host}{path}?{parts.query}" if parts.query else host + path
+
+    def _fingerprints(self, page: WikiPage) -> List[int]:
+        """
+        Calculates hashes identifying the page
+        :param page: Page to identify
+        :return: Hashes of the fingerprints
+        """
+
+        fingerprints = [hash(("url", self._canonical_url(page.url))),
+                        hash(("id", page.wiki_id, page.id))]
+
+        if self._match_titles:
+            title = TITLE_SEPARATOR_REGEX.sub(" ", page.title).strip().casefold()
+            fingerprints.append(hash(("title", page.namespace, title)))
+
+        return fingerprints
+
+    def unique(self, pages: List[WikiPage]) -> List[WikiPage]:
+        """
+        Filters out pages that are the same as the ones seen before
+        :param pages: Pages to filter
+        :return: Pages that were not seen yet
+        """
+
+        seen = self._seen
+        kept = []
+
+        for page in pages:
+            fingerprints = self._fingerprints(page)
+            if not seen.isdisjoint(fingerprints):
+                self.duplicates += 1
+                continue
+
+            seen.update(fingerprints)
+            kept.append(page)
+
+        return kept
@@ -0,0 +1,118 @@
+""" Contains class for converting raw search results into wiki pages """
+from __future__ import annotations
+
+import re
+from typing import cast, Any, Dict, List, Pattern
+
+from data import FORMATTING_CATEGORY_REGEX, TITLE_READABILITY_IMPROVEMENTS
+from data.WikiPage import WikiPage
+from utils.API import API
+
+
+class PageProcessor:
+    """
+    Filters raw pages returned by a single wiki and improves their titles,
+    with everything that depends only on the wiki (namespaces, main page) prepared once
+    """
+
+    wiki: API
+    _sitename: str
+    _wiki_id: str
+    _main_page: str
+    # Names of the content namespaces, by their ids
+    _namespaces: Dict[int, str]
+    # Patterns stripping the namespace from the improved titles, by the namespace ids
+    _namespace_prefixes: Dict[int, Pattern[str]]
+
+    def __init__(self, wiki: API) -> None:
+        self.wiki = wiki
+        self._sitename = cast(str, wiki.site["sitename"])
+        self._wiki_id = wiki.wiki_id
+        self._main_page = cast(str, wiki.site["mainpage"])
+        self._namespaces = {namespace.id: namespace.name for namespace in wiki.namespaces.values()
+                            if namespace.has_content}
+        self._namespace_prefixes = {
+            namespace_id: re.compile(rf"{re.escape(name)}:\s+")
+            for namespace_id, name in self._namespaces.items()
+        }
+
+    @property
+    def namespace_ids(self) -> List[int]:
+        """
+        Returns ids of the content namespaces, the only ones searched
+        :return: List of namespace ids
+        """
+
+        return list(self._namespaces)
+
+    def process(self, raw_pages: List[Dict[str, Any]], improved_filters: bool,
+                improved_titles: bool) -> List[WikiPage]:
+        """
+        Converts raw pages into wiki pages
+        :param raw_pages: Pages as returned by the API
+        :param improved_filters: Whether to filter out the main page, translations
+        and formatting pages
+        :param improved_titles: Whether to make the titles more readable
+        :return: List of pages
+        """
+
+        if improved_filters:
+            raw_pages = self._filter(raw_pages)
+
+        namespaces = self._namespaces
+        display_titles = [cast(str, raw_page["displaytitle"]) for raw_page in raw_pages]
+
+        if improved_titles:
+            display_titles = self._improve_titles(raw_pages, display_titles)
+
+        return [
+            WikiPage(
+                host=self.wiki.host,
+                sitename=self._sitename,
+                wiki_id=self._wiki_id,
+                id=cast(int, raw_page["pageid"]),
+                title=cast(str, raw_page["title"]),
+                display_title=display_title,
+                namespace=namespaces.get(raw_page["ns"]) or "Unknown",
+                url=cast(str, raw_page["fullurl"])
+            )
+            for raw_page, display_title in zip(raw_pages, display_titles)
+        ]
+
+    def _filter(self, raw_pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Removes the main page, translation pages and formatting pages
+        :param raw_pages: Pages as returned by the API
+        :return: Remaining pages
+        """
+
+        main_page = self._main_page
+        is_formatting = FORMATTING_CATEGORY_REGEX.match
+
+        return [
+            raw_page for raw_page in raw_pages
+            if raw_page["title"] != main_page
+            and not raw_page.get("langlinks")
+            and not any(is_formatting(category["title"])
+                        for category in raw_page.get("categories", ()))
+        ]
+
+    def _improve_titles(self, raw_pages: List[Dict[str, Any]],
+                        display_titles: List[str]) -> List[str]:
+        """
+        Makes the titles more readable and strips the namespaces from them
+        :param raw_pages: Pages as returned by the API
+        :param display_titles: Titles of the pages to improve
+        :return: Improved titles
+        """
+
+        for improvement in TITLE_READABILITY_IMPROVEMENTS:
+            substitute = improvement["regex"].sub
+            replacement = improvement["replacement"]
+            display_titles = [substitute(replacement, title) for title in display_titles]
+
+        prefixes = self._namespace_prefixes
+        return [
+            prefixes[raw_page["ns"]].sub("", title) if raw_page["ns"] in prefixes else title
+            for raw_page, title in zip(raw_pages, display_titles)
+        ]
@@ -0,0 +1,168 @@
+""" Contains class for counting how often queries are searched and their results opened """
+from __future__ import annotations
+
+import json
+import logging
+import time
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from data import QUERY_STATS_MAX_ENTRIES, QUERY_STATS_OPEN_WEIGHT, QUERY_STATS_HALF_LIFE, \
+    QUERY_STATS_TYPING_PAUSE
+from utils.AtomicFile import write_atomically
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Keeps a small frequency table of the searched queries, stored in a JSON file.
+    Queries whose results were opened weigh more and all counts fade over time,
+    only `max_entries` of the most frequent queries are kept.
+    Every keystroke is a search, so a query only counts once the user stops typing it
+    """
+
+    _path: str
+    # Number of searches, number of opened results and the time of the last use, by the query
+    _entries: Dict[str, List[float]]
+    # Query being typed and the monotonic time of its last keystroke
+    _typing: Tuple[str, float] | None
+    # Monotonic time of the last search
+    _searched_at: float
+    _lock: Lock
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._typing = None
+        self._searched_at = 0.0
+        self._lock = Lock()
+
+        self._entries = {}
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                # Skip entries of a different format instead of failing on them later
+                self._entries = {query: entry for query, entry in json.load(file).items()
+                                 if isinstance(entry, list) and len(entry) == 3}
+        except (OSError, ValueError, AttributeError):
+            logger.debug("No query stats found at %s", path)
+
+    def _score(self, entry: List[float], now: float) -> float:
+        """
+        Calculates how frequent the query is
+        :param entry: Counts of the query
+        :param now: Current time
+        :return: Score of the query, halved every half-life since the last use
+        """
+
+        searched, opened, used_at = entry
+        return (searched + opened * QUERY_STATS_OPEN_WEIGHT) * \
+            0.5 ** ((now - used_at) / QUERY_STATS_HALF_LIFE)
+
+    def _add(self, query: str, searched: int, opened: int) -> None:
+        """
+        Increments the counts of the query
+        :param query: Text that was searched
+        :param searched: Number of searches to add
+        :param opened: Number of opened results to add
+        """
+
+        query = query.lower().strip()
+        if not query:
+            return
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.setdefault(query, [0, 0, now])
+            entry[0] += searched
+            entry[1] += opened
+            entry[2] = now
+
+            # Drop the least frequent queries, with some headroom to not sort on every search
+            if len(self._entries) > QUERY_STATS_MAX_ENTRIES * 1.5:
+                self._entries = dict(sorted(
+                    self._entries.items(), key=lambda item: self._score(item[1], now), reverse=True
+                )[:QUERY_STATS_MAX_ENTRIES])
+
+    def record_search(self, query: str) -> None:
+        """
+        Counts a search of the query once the user stops typing it. A query extended
+        or shortened shortly after its previous keystroke replaces the previous one
+        :param query: Text that was searched
+        """
+
+        query = query.lower().strip()
+        now = time.monotonic()
+
+        with self._lock:
+            typing = self._typing
+            self._typing = (query, now) if query else None
+            self._searched_at = now
+
+        if not typing or typing[0] == query:
+            return
+
+        previous, typed_at = typing
+        if now - typed_at < QUERY_STATS_TYPING_PAUSE and \
+                (query.startswith(previous) or previous.startswith(query)):
+            return
+
+        self._add(previous, 1, 0)
+
+    def idle_time(self) -> float:
+        """
+        Returns the time since the last search
+        :return: Time (in seconds) since the last search
+        """
+
+        return time.monotonic() - self._searched_at
+
+    def record_open(self, query: str) -> None:
+        """
+        Counts a result of the query being opened, the user stopped typing on the query
+        :param query: Text that was searched
+        """
+
+        query = query.lower().strip()
+        with self._lock:
+            stopped = self._typing is not None and self._typing[0] == query
+            if stopped:
+                self._typing = None
+
+        self._add(query, int(stopped), 1)
+
+    def _finish_typing(self) -> None:
+        """ Counts the query being typed if the user stopped typing it """
+
+        with self._lock:
+            typing = self._typing
+            if not typing or time.monotonic() - typing[1] < QUERY_STATS_TYPING_PAUSE:
+                return
+            self._typing = None
+
+        self._add(typing[0], 1, 0)
+
+    def top(self, limit: int) -> List[str]:
+        """
+        Returns the most frequent queries
+        :param limit: Maximum number of queries to return
+        :return: Queries, from the most frequent
+        """
+
+        self._finish_typing()
+
+        now = time.time()
+        with self._lock:
+            ranked = sorted(self._entries.items(), key=lambda item: self._score(item[1], now),
+                            reverse=True)
+
+        return [query for query, _ in ranked[:limit]]
+
+    def save(self) -> None:
+        """ Writes the table to the disk """
+
+        self._finish_typing()
+
+        with self._lock:
+            serialized = json.dumps(self._entries, separators=(",", ":"))
+
+        write_atomically(self._path, lambda file: file.write(serialized), "query stats")
@@ -0,0 +1,45 @@
+""" Contains transport adapter recording the responses of the wikis """
+from __future__ import annotations
+
+import time
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+from utils.TrafficArchive import TrafficArchive
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Sends the requests through another adapter and records every response to the archive.
+    Streamed responses are read whole, so the replay can serve any part of them
+    """
+
+    _adapter: BaseAdapter
+    _archive: TrafficArchive
+
+    def __init__(self, adapter: BaseAdapter, archive: TrafficArchive) -> None:
+        """
+        :param adapter: Adapter sending the requests
+        :param archive: Archive the responses are recorded to
+        """
+
+        super().__init__()
+        self._adapter = adapter
+        self._archive = archive
+
+    # pylint: disable=too-many-arguments
+    def send(self, request: PreparedRequest, stream=False, timeout=None, verify=True, cert=None,
+             proxies=None) -> Response:
+        start = time.perf_counter()
+        response = self._adapter.send(request, stream=stream, timeout=timeout, verify=verify,
+                                      cert=cert, proxies=proxies)
+        # Accessing the content reads the body, the response still works as if streamed
+        _ = response.content
+
+        self._archive.add(request, response, time.perf_counter() - start)
+        return response
+
+    def close(self) -> None:
+        self._adapter.close()
+        self._archive.save(force=True)
@@ -0,0 +1,59 @@
+""" Contains transport adapter serving recorded responses instead of the wikis """
+from __future__ import annotations
+
+import io
+import time
+
+from requests import ConnectionError as RequestsConnectionError, PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from utils.TrafficArchive import TrafficArchive
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers the requests from the archive without touching the network, after the recorded
+    latency or a fixed one. Requests missing from the archive fail as if the wiki was offline
+    """
+
+    _archive: TrafficArchive
+    _latency: float | None
+
+    def __init__(self, archive: TrafficArchive, latency: float | None = None) -> None:
+        """
+        :param archive: Archive with the recorded responses
+        :param latency: (optional) Latency (in seconds) of every response,
+        the recorded latency is used if not specified
+        """
+
+        super().__init__()
+        self._archive = archive
+        self._latency = latency
+
+    # pylint: disable=too-many-arguments
+    def send(self, request: PreparedRequest, stream=False, timeout=None, verify=True, cert=None,
+             proxies=None) -> Response:
+        entry = self._archive.get(request)
+        if entry is None:
+            raise RequestsConnectionError(f"No recorded response for {request.url}",
+                                          request=request)
+
+        time.sleep(entry["latency"] if self._latency is None else self._latency)
+
+        response = Response()
+        response.status_code = entry["status"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        # The body is read on demand, like from a socket, so the streamed reads work the same
+        response.raw = io.BytesIO(entry["body"])
+        response.url = request.url or ""
+        response.request = request
+        response.connection = self
+
+        return response
+
+    def close(self) -> None:
+        pass
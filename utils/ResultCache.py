@@ -0,0 +1,201 @@
+""" Contains class for persisting search results between restarts """
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import cast, Callable, Dict, Hashable, List, Tuple
+
+from data.WikiPage import WikiPage
+from utils.API import API
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Stores search results in an SQLite database, limited to a number `max_entries`
+    of the most recently used entries. Entries older than `ttl` are still returned,
+    but marked as stale, until they become older than `max_age`
+    """
+
+    _connection: sqlite3.Connection | None
+    _ttl: float
+    _max_age: float
+    _max_entries: int
+    _lock: Lock
+
+    def __init__(self, path: str, ttl: float, max_age: float, max_entries: int) -> None:
+        self._ttl = ttl
+        self._max_age = max_age
+        self._max_entries = max_entries
+        self._lock = Lock()
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, wikis TEXT NOT NULL, pages TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+            )
+            self._connection.commit()
+        except (OSError, sqlite3.Error) as error:
+            # Caching is an optimization, search without it if the database is not usable
+            logger.warning("Unable to open result cache: %s", error)
+            self._connection = None
+
+    @staticmethod
+    def _serialize_key(key: Hashable) -> str:
+        """
+        Converts the cache key into a string
+        :param key: Cache key, a tuple of JSON serializable values
+        :return: Serialized key
+        """
+
+        return json.dumps(key, separators=(",", ":"))
+
+    @staticmethod
+    def _deserialize_key(serialized_key: str) -> Tuple:
+        """
+        Converts the serialized key back into a tuple
+        :param serialized_key: Serialized key
+        :return: Cache key, nested lists are converted into tuples as well
+        """
+
+        return tuple(tuple(value) if isinstance(value, list) else value
+                     for value in json.loads(serialized_key))
+
+    def get(self, key: Hashable, wikis: Dict[str, API]) -> Tuple[List[WikiPage] | None, bool]:
+        """
+        Returns the cached pages for the key
+        :param key: Cache key, a tuple of JSON serializable values
+        :param wikis: Configured wikis, used to rebuild the pages
+        :return: Pages or None if not cached, and whether the entry is stale
+        """
+
+        if not self._connection:
+            return None, False
+
+        now = time.time()
+        serialized_key = self._serialize_key(key)
+
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT pages, created FROM results WHERE key = ?", (serialized_key,)
+                ).fetchone()
+
+                if not row:
+                    return None, False
+
+                if now - row[1] > self._max_age:
+                    self._connection.execute("DELETE FROM results WHERE key = ?",
+                                             (serialized_key,))
+                    self._connection.commit()
+                    return None, False
+
+                self._connection.execute("UPDATE results SET accessed = ? WHERE key = ?",
+                                         (now, serialized_key))
+                self._connection.commit()
+        except sqlite3.Error as error:
+            logger.warning("Unable to read from result cache: %s", error)
+            return None, False
+
+        pages = []
+        for host, page_id, title, display_title, namespace, url in json.loads(row[0]):
+            # The wiki was removed from the configuration since the entry was created
+            if host not in wikis:
+                return None, False
+
+            pages.append(WikiPage(
+                host=host,
+                sitename=cast(str, wikis[host].site["sitename"]),
+                wiki_id=wikis[host].wiki_id,
+                id=page_id,
+                title=title,
+                display_title=display_title,
+                namespace=namespace,
+                url=url
+            ))
+
+        return pages, now - row[1] > self._ttl
+
+    def is_fresh(self, key: Hashable) -> bool:
+        """
+        Checks whether the key is cached and not stale, without marking it as used
+        :param key: Cache key, a tuple of JSON serializable values
+        :return: True if the entry is younger than `ttl`
+        """
+
+        if not self._connection:
+            return False
+
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT created FROM results WHERE key = ?", (self._serialize_key(key),)
+                ).fetchone()
+        except sqlite3.Error as error:
+            logger.warning("Unable to read from result cache: %s", error)
+            return False
+
+        return bool(row) and time.time() - row[0] <= self._ttl
+
+    def put(self, key: Hashable, wikis: List[str], pages: List[WikiPage]) -> None:
+        """
+        Stores the pages and evicts the least recently used entries above the limit
+        :param key: Cache key, a tuple of JSON serializable values
+        :param wikis: Hosts of the wikis that were searched
+        :param pages: Pages to store
+        """
+
+        if not self._connection:
+            return
+
+        now = time.time()
+        records = [
+            [page.host, page.id, page.title, page.display_title, page.namespace, page.url]
+            for page in pages
+        ]
+
+        try:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (self._serialize_key(key),
+                     f"|{'|'.join(wikis)}|",
+                     json.dumps(records, separators=(",", ":")), now, now)
+                )
+                self._connection.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY accessed DESC LIMIT ?)",
+                    (self._max_entries,)
+                )
+                self._connection.commit()
+        except sqlite3.Error as error:
+            logger.warning("Unable to write to result cache: %s", error)
+
+    def invalidate(self, stale: Callable[[Tuple], bool]) -> None:
+        """
+        Removes the matching entries
+        :param stale: Returns True for the cache keys of the entries to remove
+        """
+
+        if not self._connection:
+            return
+
+        try:
+            with self._lock:
+                keys = [(row[0],) for row in self._connection.execute("SELECT key FROM results")
+                        if stale(self._deserialize_key(row[0]))]
+                self._connection.executemany("DELETE FROM results WHERE key = ?", keys)
+                self._connection.commit()
+        except sqlite3.Error as error:
+            logger.warning("Unable to invalidate result cache: %s", error)
@@ -1,12 +1,12 @@
-""" Contains generic type for items that contain score """
+""" Contains generic type for items that can be scored """
 from abc import abstractmethod
 from typing import Protocol, List
 
 
 # pylint: disable=too-few-public-methods
 class ScorableItem(Protocol):
-    """ Generic class representing item that has score """
-    _score: int
+    """ Generic class representing item that can be scored """
+    __slots__ = ()
 
     @abstractmethod
     def _get_score_fields(self) -> List[str]:
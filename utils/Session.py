@@ -0,0 +1,75 @@
+""" Contains class extending requests' Session class to tune it for many small API requests """
+from __future__ import annotations
+
+from typing import Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.RecordingAdapter import RecordingAdapter
+from utils.ReplayAdapter import ReplayAdapter
+from utils.TrafficArchive import TrafficArchive
+
+try:
+    # noinspection PyUnresolvedReferences
+    import brotli  # type: ignore # pylint: disable=unused-import
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+class Session(requests.Session):
+    """
+    Session shared by all wikis, keeps connections alive between requests
+    and applies default timeouts to every request
+    """
+
+    timeout: Tuple[float, float]
+
+    def __init__(self, user_agent: str, timeout: Tuple[float, float], pool_connections: int,
+                 pool_maxsize: int) -> None:
+        """
+        :param user_agent: User agent sent with every request
+        :param timeout: Default connect and read timeouts (in seconds)
+        :param pool_connections: Number of hosts whose connections are kept alive
+        :param pool_maxsize: Number of connections kept alive per host
+        """
+
+        super().__init__()
+        self.timeout = timeout
+        self.headers.update({
+            "User-Agent": user_agent,
+            # Decoded transparently by urllib3, brotli only if the package is installed
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Connection": "keep-alive"
+        })
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    # pylint: disable=arguments-differ
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, *args, **kwargs)
+
+    def record(self, archive: TrafficArchive) -> None:
+        """
+        Records every response to the archive, the requests are still sent to the wikis
+        :param archive: Archive the responses are recorded to
+        """
+
+        for prefix, adapter in list(self.adapters.items()):
+            self.mount(prefix, RecordingAdapter(adapter, archive))
+
+    def replay(self, archive: TrafficArchive, latency: float | None = None) -> None:
+        """
+        Serves the responses from the archive instead of sending the requests
+        :param archive: Archive with the recorded responses
+        :param latency: (optional) Latency (in seconds) of every response,
+        the recorded latency is used if not specified
+        """
+
+        adapter = ReplayAdapter(archive, latency)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
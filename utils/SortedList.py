@@ -1,13 +1,35 @@
 """ Contains custom implementation of SortedList found in Ulauncher's code """
-from typing import Iterator, TypeVar, Generic, List
+from __future__ import annotations
+
+from collections import Counter
+from functools import lru_cache
+from heapq import heappush, heapreplace
+from itertools import count
+from typing import Dict, Iterator, TypeVar, Generic, List, Tuple
 
-from ulauncher.utils.SortedCollection import SortedCollection  # type: ignore
 from ulauncher.utils.fuzzy_search import get_score  # type: ignore
 
+from data import SCORE_CACHE_SIZE
+from utils.Metrics import metrics
 from utils.ScorableItem import ScorableItem
 
 T = TypeVar("T", bound=ScorableItem)
 
+# Tolerance of the floating point error between the score and its upper bound
+SCORE_EPSILON = 1e-9
+
+
+@lru_cache(maxsize=SCORE_CACHE_SIZE)
+def _get_score(query: str, text: str) -> float:
+    """
+    Memoized version of Ulauncher's fuzzy score, the same titles are scored on every keystroke
+    :param query: Lowercase query
+    :param text: Text to score
+    :return: Similarity between the query and the text
+    """
+
+    return get_score(query, text)
+
 
 # noinspection PyProtectedMember
 # pylint: disable=protected-access
@@ -15,22 +37,51 @@ class SortedList(Generic[T]):
     """
     List maintains items in a sorted order
     (sorted by a score, which is a similarity between item's name and a query)
-    and limited to a number `limit` passed into the constructor
+    and limited to a number `limit` passed into the constructor.
+    Items with equal scores keep the order in which they were added
     """
 
     _query: str
+    _query_characters: Dict[str, int]
     _min_score: int
     _limit: int
-    _items: SortedCollection
+    # Min-heap of the kept items, the worst item (lowest score, added last) is on the top
+    _heap: List[Tuple[float, int, T]]
+    _sequence: Iterator[int]
+    _sorted: List[T] | None
 
     def __init__(self, query: str, min_score: int = 30, limit: int = 9) -> None:
         self._query = query.lower().strip()
+        self._query_characters = Counter(self._query)
         self._min_score = min_score
         self._limit = limit
-        self._items = SortedCollection(key=lambda item: item._score)
+        self._heap = []
+        self._sequence = count()
+        self._sorted = None
+
+    @property
+    def limit(self) -> int:
+        """
+        Returns maximum number of items in the list
+        :return: Maximum number of items
+        """
+
+        return self._limit
+
+    @property
+    def _items(self) -> List[T]:
+        """
+        Returns the kept items from the best one, sorting them only when the list changed
+        :return: Sorted items
+        """
+
+        if self._sorted is None:
+            self._sorted = [entry[2] for entry in sorted(self._heap, reverse=True)]
+
+        return self._sorted
 
     def __len__(self) -> int:
-        return len(self._items)
+        return len(self._heap)
 
     def __getitem__(self, i: int) -> T:
         return self._items[i]
@@ -48,13 +99,70 @@ class SortedList(Generic[T]):
     def __contains__(self, item: T) -> bool:
         return item in self._items
 
+    def _max_score(self, text: str) -> float:
+        """
+        Calculates an upper bound of the score without running the fuzzy matching.
+        Matched characters are a subsequence of the text, so there can't be more of them
+        than characters the query and the text have in common
+        :param text: Text to score
+        :return: Highest score the text can get
+        """
+
+        lowercase = text.lower()
+        common = sum(min(occurrences, lowercase.count(character))
+                     for character, occurrences in self._query_characters.items())
+
+        query_length = len(self._query)
+        max_length = max(query_length, len(text))
+        return 100 * common / (query_length + (max_length - query_length) * 0.001) + SCORE_EPSILON
+
     def extend(self, items: List[T]) -> None:
         """
-        Merges all provided items into this list
+        Merges all provided items into this list, skipping the fuzzy matching of the items
+        that can't score higher than the worst kept item
+        :param items: A list of items to merge
+        """
+
+        if self._limit <= 0:
+            return
+
+        with metrics.span("scoring"):
+            self._extend(items)
+
+    def _extend(self, items: List[T]) -> None:
+        """
+        Scores the items and keeps the best ones
         :param items: A list of items to merge
         """
+
+        heap = self._heap
         for item in items:
-            self.append(item)
+            # Items with equal scores keep their order, so a new item has to be strictly better
+            full = len(heap) >= self._limit
+            score = 0.0
+
+            for value in item._get_score_fields():
+                if not value:
+                    continue
+
+                max_score = self._max_score(value)
+                if max_score < self._min_score or max_score <= score or \
+                        (full and max_score <= heap[0][0]):
+                    continue
+
+                score = max(score, _get_score(self._query, value))
+
+            if score < self._min_score or (full and score <= heap[0][0]):
+                continue
+
+            # Negative sequence makes the item added later the worse one of equally scored items
+            entry = (score, -next(self._sequence), item)
+            if full:
+                heapreplace(heap, entry)
+            else:
+                heappush(heap, entry)
+
+            self._sorted = None
 
     def append(self, item: T) -> None:
         """
@@ -62,13 +170,4 @@ class SortedList(Generic[T]):
         :param item: Item to add
         """
 
-        score = max((get_score(self._query, value) for value in item._get_score_fields()))
-
-        if score >= self._min_score:
-            # use negative to sort by score in desc. order
-            item._score = -score
-
-            self._items.insert(item)
-            while len(self._items) > self._limit:
-                # remove items with the lowest score to maintain limited number of items
-                self._items.pop()
+        self.extend([item])
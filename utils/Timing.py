@@ -0,0 +1,63 @@
+""" Contains class for summarizing durations of a repeated operation """
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class Timing:
+    """ Holds durations of a single phase, keeping only the most recent ones for percentiles """
+
+    count: int
+    errors: int
+    total: float
+    maximum: float
+    samples: Deque[float]
+
+    def __init__(self, samples: int) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0
+        self.maximum = 0
+        self.samples = deque(maxlen=samples)
+
+    def add(self, duration: float, error: bool) -> None:
+        """
+        Records a single duration
+        :param duration: Duration (in seconds)
+        :param error: Whether the phase failed
+        """
+
+        self.count += 1
+        self.errors += error
+        self.total += duration
+        self.maximum = max(self.maximum, duration)
+        self.samples.append(duration)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Calculates the percentile of the recent durations using the nearest-rank method
+        :param percent: Percentile to calculate, between 0 and 100
+        :return: Duration (in seconds) or 0 if nothing was recorded
+        """
+
+        if not self.samples:
+            return 0
+
+        ordered = sorted(self.samples)
+        return ordered[max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarizes the durations
+        :return: Number of runs, errors and durations in milliseconds
+        """
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "max_ms": round(self.maximum * 1000, 2)
+        }
@@ -0,0 +1,247 @@
+""" Contains class for searching wiki page titles locally """
+from __future__ import annotations
+
+import json
+import logging
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, IO, Iterator, List, Tuple
+
+from utils.API import API
+from utils.AtomicFile import write_atomically
+
+logger = logging.getLogger(__name__)
+
+# Format of the timestamps used by the MediaWiki API
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+IndexData = Tuple[List[str], List[str], array, array]
+
+
+class TitleIndex:
+    """
+    Keeps titles of all content pages of a wiki sorted in the memory and on the disk,
+    so the titles can be searched by a prefix without making any requests
+    """
+
+    _path: str
+    _max_pages: int
+    _max_age: float
+    _synced_at: str | None
+    _checked_at: float
+    # Lowercase titles used for searching, titles, page ids and namespace ids, sorted together
+    _data: IndexData
+    _lock: Lock
+
+    def __init__(self, path: str, max_pages: int, max_age: float) -> None:
+        self._path = path
+        self._max_pages = max_pages
+        self._max_age = max_age
+        self._synced_at = None
+        self._checked_at = 0
+        self._data = ([], [], array("l"), array("l"))
+        self._lock = Lock()
+
+        self._load()
+
+    @property
+    def ready(self) -> bool:
+        """
+        Returns whether the index was synchronized at least once
+        :return: True if the index can be searched
+        """
+
+        return self._synced_at is not None
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, int, str]]:
+        """
+        Finds pages with titles starting with the prefix, ignoring case
+        :param prefix: Beginning of the title
+        :param limit: Maximum number of pages to return
+        :return: List of page ids, namespace ids and titles
+        """
+
+        keys, titles, ids, namespaces = self._data
+        prefix = prefix.lower().strip()
+        start = bisect_left(keys, prefix)
+
+        results = []
+        for index in range(start, min(start + limit, len(keys))):
+            if not keys[index].startswith(prefix):
+                break
+            results.append((ids[index], namespaces[index], titles[index]))
+
+        return results
+
+    def outdated(self, interval: float) -> bool:
+        """
+        Returns whether the index should be synchronized
+        :param interval: Minimum time (in seconds) between synchronizations
+        :return: True if the index was not synchronized for longer than the interval
+        """
+
+        return time.time() - self._checked_at >= interval and not self._lock.locked()
+
+    def sync(self, wiki: API) -> None:
+        """
+        Updates the index with pages created, moved or deleted since the last synchronization,
+        or builds it from scratch if the changes are no longer available
+        :param wiki: Wiki the index belongs to
+        """
+
+        # Skip if the index is already being synchronized
+        # pylint: disable=consider-using-with
+        if not self._lock.acquire(blocking=False):
+            return
+
+        try:
+            self._checked_at = time.time()
+            namespaces = [namespace.id for namespace in wiki.namespaces.values()
+                          if namespace.has_content]
+
+            if self._synced_at and time.time() - datetime.strptime(
+                    self._synced_at, TIMESTAMP_FORMAT
+            ).replace(tzinfo=timezone.utc).timestamp() < self._max_age:
+                self._refresh(wiki, namespaces)
+            else:
+                self._build(wiki, namespaces)
+
+            self._save()
+            logger.debug("Synchronized title index of %s, %s pages", wiki.host,
+                         len(self._data[0]))
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Unable to synchronize title index of %s: %s", wiki.host, error)
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _query(wiki: API, **kwargs) -> Iterator[Dict[str, Any]]:
+        r"""
+        Runs the query and follows its continuation
+        :param wiki: Wiki to query
+        :param kwargs: \*\*kwargs: Query parameters
+        :return: Responses of the consecutive requests
+        """
+
+        continuation: Dict[str, Any] = {}
+        while True:
+            result = wiki.get(action="query", curtimestamp=True, **kwargs, **continuation)
+            yield result
+
+            if "continue" not in result:
+                return
+            continuation = result["continue"]
+
+    def _build(self, wiki: API, namespaces: List[int]) -> None:
+        """
+        Downloads titles of all pages in the namespaces
+        :param wiki: Wiki to download from
+        :param namespaces: Namespace ids to include
+        """
+
+        synced_at: str | None = None
+        pages: Dict[str, Tuple[int, int]] = {}
+
+        for namespace in namespaces:
+            for result in self._query(wiki, list="allpages", apnamespace=namespace, aplimit="max"):
+                synced_at = synced_at or result["curtimestamp"]
+
+                for page in result["query"]["allpages"]:
+                    pages[page["title"]] = (page["pageid"], page["ns"])
+
+                if len(pages) > self._max_pages:
+                    raise OverflowError(f"wiki has more than {self._max_pages} pages")
+
+        self._set_pages(pages)
+        self._synced_at = synced_at
+
+    def _refresh(self, wiki: API, namespaces: List[int]) -> None:
+        """
+        Applies changes made to the pages since the last synchronization
+        :param wiki: Wiki to download the changes from
+        :param namespaces: Namespace ids to include
+        """
+
+        _, titles, ids, namespace_ids = self._data
+        pages = {title: (ids[index], namespace_ids[index]) for index, title in enumerate(titles)}
+        synced_at: str | None = None
+
+        # Recent changes are listed from the oldest, so they can be applied in order
+        for result in self._query(wiki, list="recentchanges", rcdir="newer",
+                                  rcstart=self._synced_at, rcnamespace=namespaces,
+                                  rctype=["new", "log"], rcprop=["title", "ids", "loginfo"],
+                                  rclimit="max"):
+            synced_at = synced_at or result["curtimestamp"]
+
+            for change in result["query"]["recentchanges"]:
+                if change["type"] == "new":
+                    pages[change["title"]] = (change["pageid"], change["ns"])
+                elif change.get("logtype") == "delete" and change.get("logaction") == "delete":
+                    pages.pop(change["title"], None)
+                elif change.get("logtype") == "move":
+                    target = change.get("logparams", {})
+                    moved = pages.pop(change["title"], None)
+                    if moved and target.get("target_ns") in namespaces:
+                        pages[target["target_title"]] = (moved[0], target["target_ns"])
+
+        self._set_pages(pages)
+        self._synced_at = synced_at
+
+    @staticmethod
+    def _key(title: str) -> str:
+        """
+        Returns the lowercase title used for searching
+        :param title: Title of the page
+        :return: Lowercase title, the title itself if it's already lowercase to not store it twice
+        """
+
+        key = title.lower()
+        return title if key == title else key
+
+    def _set_pages(self, pages: Dict[str, Tuple[int, int]]) -> None:
+        """
+        Replaces the indexed pages
+        :param pages: Page ids and namespace ids of the pages, by the title
+        """
+
+        entries = sorted((self._key(title), title, page_id, namespace)
+                         for title, (page_id, namespace) in pages.items())
+
+        # Replace all lists at once, so searches running at the same time see consistent data
+        self._data = (
+            [entry[0] for entry in entries],
+            [entry[1] for entry in entries],
+            array("l", (entry[2] for entry in entries)),
+            array("l", (entry[3] for entry in entries))
+        )
+
+    def _load(self) -> None:
+        """ Loads the index from the disk """
+
+        try:
+            with open(self._path, "r", encoding="utf-8") as file:
+                header = json.loads(file.readline())
+                pages = {}
+                for line in file:
+                    page_id, namespace, title = line.rstrip("\n").split("\t", 2)
+                    pages[title] = (int(page_id), int(namespace))
+        except (OSError, ValueError):
+            return
+
+        self._set_pages(pages)
+        self._synced_at = header["synced_at"]
+
+    def _save(self) -> None:
+        """ Writes the index to the disk """
+
+        _, titles, ids, namespaces = self._data
+
+        def write(file: IO[str]) -> None:
+            file.write(json.dumps({"synced_at": self._synced_at}) + "\n")
+            for index, title in enumerate(titles):
+                file.write(f"{ids[index]}\t{namespaces[index]}\t{title}\n")
+
+        write_atomically(self._path, write, "title index")
@@ -0,0 +1,93 @@
+""" Contains class for keeping the local title indexes of the wikis """
+from __future__ import annotations
+
+import os
+from threading import Lock, Thread
+from typing import Dict, List, Set
+
+from data import CACHE_DIR, TITLE_INDEX_MAX_PAGES, TITLE_INDEX_MAX_AGE, TITLE_INDEX_SYNC_INTERVAL
+# noinspection PyPep8Naming
+from utils.API import API
+from utils.TitleIndex import TitleIndex
+
+
+class TitleIndexes:
+    """
+    Opens the title indexes of the wikis they are enabled for and keeps them up to date.
+    The index is enabled by the address of the wiki, but kept by the host the wiki
+    redirects to, which is the one the wiki is searched by
+    """
+
+    # Network locations of the wikis with the local title index enabled
+    _urls: List[str]
+    # Indexes of the resolved wikis by the host of the wiki
+    _indexes: Dict[str, TitleIndex]
+    _lock: Lock
+
+    def __init__(self) -> None:
+        self._urls = []
+        self._indexes = {}
+        self._lock = Lock()
+
+    def enable(self, netlocs: List[str], resolved: Dict[str, API]) -> Set[str]:
+        """
+        Enables the title index for the wikis, the rest of the indexes is closed
+        :param netlocs: Network locations of the wikis to enable the index for
+        :param resolved: Resolved wikis by the network location they are configured with
+        :return: Hosts of the wikis that started or stopped using the index
+        """
+
+        previous = set(self._indexes)
+        self._urls = netlocs
+        self.sync(resolved)
+
+        return previous.symmetric_difference(self._indexes)
+
+    def sync(self, resolved: Dict[str, API]) -> None:
+        """
+        Opens the title indexes of the resolved wikis and starts updating the outdated ones
+        in the background
+        :param resolved: Resolved wikis by the network location they are configured with
+        """
+
+        wikis = {endpoint.host: endpoint for endpoint in resolved.values()}
+
+        with self._lock:
+            enabled = {resolved[netloc].host if netloc in resolved else netloc
+                       for netloc in self._urls}
+            self._indexes = indexes = {
+                host: self._indexes.get(host) or TitleIndex(
+                    os.path.join(CACHE_DIR, "indexes", host.replace(":", "_") + ".tsv"),
+                    TITLE_INDEX_MAX_PAGES,
+                    TITLE_INDEX_MAX_AGE
+                )
+                for host in enabled if host in wikis
+            }
+
+        for host, index in indexes.items():
+            self._sync(wikis[host], index)
+
+    def get(self, wiki: API) -> TitleIndex | None:
+        """
+        Returns the title index of the wiki, starts updating it if it's outdated
+        :param wiki: Wiki to return the index of
+        :return: Title index or None if the index is not enabled for the wiki
+        """
+
+        index = self._indexes.get(wiki.host)
+        if index:
+            self._sync(wiki, index)
+
+        return index
+
+    @staticmethod
+    def _sync(wiki: API, index: TitleIndex) -> None:
+        """
+        Starts updating the title index in the background if it's outdated
+        :param wiki: Wiki the index belongs to
+        :param index: Title index of the wiki
+        """
+
+        if index.outdated(TITLE_INDEX_SYNC_INTERVAL):
+            # Building the index can take a while, don't hold the search thread pool
+            Thread(target=index.sync, args=(wiki,), daemon=True).start()
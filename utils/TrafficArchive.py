@@ -0,0 +1,153 @@
+""" Contains class for storing recorded HTTP responses """
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import time
+from threading import Lock
+from typing import Any, Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from requests import PreparedRequest, Response
+
+from utils.AtomicFile import write_atomically
+
+logger = logging.getLogger(__name__)
+
+# Headers describing the transfer, not the content, the body is stored decoded
+TRANSFER_HEADERS = {"connection", "content-encoding", "content-length", "keep-alive",
+                    "transfer-encoding", "set-cookie"}
+
+
+class TrafficArchive:
+    """
+    Keeps recorded HTTP responses in a gzipped JSON file, grouped by their requests.
+    A request sent several times gets the responses in the order they were recorded
+    """
+
+    _path: str
+    _save_interval: float
+    _entries: Dict[str, List[Dict[str, Any]]]
+    # Number of responses already served for every request
+    _served: Dict[str, int]
+    _saved_at: float
+    _changed: bool
+    _lock: Lock
+
+    def __init__(self, path: str, save_interval: float) -> None:
+        """
+        :param path: Path of the archive file
+        :param save_interval: Time (in seconds) between writes of the recorded responses
+        """
+
+        self._path = path
+        self._save_interval = save_interval
+        self._entries = {}
+        self._served = {}
+        self._saved_at = time.time()
+        self._changed = False
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._entries.values())
+
+    @staticmethod
+    def key(request: PreparedRequest) -> str:
+        """
+        Identifies the request regardless of the order of its parameters
+        :param request: Sent request
+        :return: Method, URL and the form data of the request
+        """
+
+        url = urlsplit(request.url or "")
+        body = request.body.decode("latin-1") if isinstance(request.body, bytes) else \
+            request.body or ""
+
+        key = f"{request.method} {url.scheme}://{url.netloc}{url.path}"
+        if url.query:
+            key += "?" + urlencode(sorted(parse_qsl(url.query, keep_blank_values=True)))
+        if body:
+            key += " " + urlencode(sorted(parse_qsl(body, keep_blank_values=True)))
+
+        return key
+
+    def load(self) -> None:
+        """ Reads the recorded responses, the archive stays empty if the file can't be read """
+
+        try:
+            with gzip.open(self._path, "rt", encoding="utf-8") as file:
+                self._entries = json.load(file)["entries"]
+        except (OSError, ValueError, KeyError, EOFError) as error:
+            logger.warning("Unable to load recorded traffic: %s", error)
+            self._entries = {}
+
+        self._served = {}
+
+    def add(self, request: PreparedRequest, response: Response, latency: float) -> None:
+        """
+        Records the response, its body has to be already read
+        :param request: Sent request
+        :param response: Received response
+        :param latency: Time (in seconds) it took to receive the response
+        """
+
+        entry = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: value for name, value in response.headers.items()
+                        if name.lower() not in TRANSFER_HEADERS},
+            # Latin-1 maps every byte to a single character, so any body survives the JSON
+            "body": (response.content or b"").decode("latin-1"),
+            "latency": round(latency, 4)
+        }
+
+        with self._lock:
+            self._entries.setdefault(self.key(request), []).append(entry)
+            self._changed = True
+
+        self.save()
+
+    def get(self, request: PreparedRequest) -> Dict[str, Any] | None:
+        """
+        Returns the next recorded response of the request, repeating the last one when
+        the request is sent more times than it was recorded
+        :param request: Sent request
+        :return: Status, reason, headers, body and latency of the response
+        or None if the request was not recorded
+        """
+
+        key = self.key(request)
+
+        with self._lock:
+            responses = self._entries.get(key)
+            if not responses:
+                return None
+
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+
+        entry = responses[min(index, len(responses) - 1)]
+        return {**entry, "body": entry["body"].encode("latin-1")}
+
+    def save(self, force: bool = False) -> None:
+        """
+        Writes the recorded responses to the disk
+        :param force: (optional) Whether to write even if the file was saved recently
+        """
+
+        with self._lock:
+            if not self._changed or \
+                    (not force and time.time() - self._saved_at < self._save_interval):
+                return
+
+            self._saved_at = time.time()
+            self._changed = False
+            document = {
+                "saved_at": self._saved_at,
+                "entries": {key: list(responses) for key, responses in self._entries.items()}
+            }
+
+        write_atomically(self._path, lambda file: json.dump(document, file, ensure_ascii=False,
+                                                            separators=(",", ":")),
+                         "recorded traffic", gzip.open)
@@ -0,0 +1,212 @@
+""" Contains class for finding the MediaWiki API endpoint of a site """
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import cast, Any, Callable, Dict, List
+from urllib.parse import ParseResult as URL, urljoin, urlparse
+
+import requests
+
+from data import COMMON_API_ENDPOINTS, KNOWN_API_ENDPOINTS, MEDIA_WIKI_EDIT_URI_REGEX, \
+    HTML_HREF_REGEX, HTML_HEAD_END_REGEX, HTML_HEAD_MAX_BYTES, HTML_CHUNK_SIZE, SEARCH_MAX_WORKERS
+from utils.API import API
+
+logger = logging.getLogger(__name__)
+
+
+# pylint: disable=too-few-public-methods
+class WikiDetector:
+    """
+    Finds the API endpoint of a wiki with as little traffic as possible.
+    The common endpoints are probed at once with a site info query, which also proves that
+    the site runs MediaWiki, and only if none of them responds the landing page is asked for
+    the `EditURI` link, first in the headers, then in the `<head>` of the page
+    """
+
+    _session: requests.Session
+    _api_options: Callable[[], Dict[str, Any]]
+    # Shared by all discoveries, enough threads to probe every endpoint of every wiki
+    # discovered at the same time
+    _probes: ThreadPoolExecutor
+
+    def __init__(self, session: requests.Session, api_options: Callable[[], Dict[str, Any]]) \
+            -> None:
+        """
+        :param session: Session used for all requests
+        :param api_options: Returns keyword arguments for the :class:`API` constructor
+        """
+
+        self._session = session
+        self._api_options = api_options
+        self._probes = ThreadPoolExecutor(
+            max_workers=len(COMMON_API_ENDPOINTS) * SEARCH_MAX_WORKERS,
+            thread_name_prefix="wiki-probe"
+        )
+
+    # noinspection PyProtectedMember
+    def detect(self, url: URL) -> API | None:
+        """
+        Detects whether the site runs MediaWiki and finds its API endpoint
+        :param url: URL pointing to the MediaWiki site
+        :return: MediaWiki API or None if not resolved
+        """
+
+        # If there is no scheme specified set it as "http" and relay on the https redirect
+        if not url.scheme:
+            url = url._replace(scheme="http")
+
+        known_api_endpoint = next((endpoint_data for endpoint_data in KNOWN_API_ENDPOINTS if
+                                   endpoint_data.regex.match(cast(str, url.hostname))), None)
+
+        if known_api_endpoint:
+            return self._probe_endpoint(url._replace(path=known_api_endpoint.path))
+
+        api = self._probe_endpoints([url._replace(path=common_endpoint)
+                                     for common_endpoint in COMMON_API_ENDPOINTS])
+        if api:
+            return api
+
+        # The wiki keeps the API somewhere else, the landing page links to it
+        api_url = self._find_edit_uri(url)
+        if not api_url:
+            return None
+
+        logger.debug("Found API endpoint of %s in the landing page: %s", url.netloc,
+                     api_url.geturl())
+        return self._probe_endpoint(api_url)
+
+    def _probe_endpoints(self, urls: List[URL]) -> API | None:
+        """
+        Probes all endpoints at once and takes the first valid one, in the order of preference
+        :param urls: URLs of the directories with the `api.php` script
+        :return: MediaWiki API object or None if none of the endpoints is valid
+        """
+
+        probes = [self._probes.submit(self._probe_endpoint, url) for url in urls]
+        try:
+            return next(filter(None, (probe.result() for probe in probes)), None)
+        finally:
+            # Don't wait for the less preferred endpoints once a valid one is found
+            for probe in probes:
+                probe.cancel()
+
+    def _probe_endpoint(self, url: URL) -> API | None:
+        """
+        Checks whether the API endpoint is valid and initializes the MediaWiki API object
+        from the same response, without a separate request for the site info
+        :param url: URL of the directory with the `api.php` script
+        :return: MediaWiki API object or None if the endpoint is not valid
+        """
+
+        try:
+            res = self._session.get(url.geturl() + "api.php", params={
+                "format": "json",
+                "action": "query",
+                "meta": "siteinfo",
+                "siprop": "general|namespaces"
+            })
+        except requests.RequestException as error:
+            logger.debug("Unable to probe %s: %s", url.geturl(), error)
+            return None
+
+        content_type = res.headers.get("content-type")
+        if not res.ok or "application/json" not in (content_type or ""):
+            return None
+
+        try:
+            result = res.json()
+        except ValueError:
+            return None
+
+        if not isinstance(result, dict) or result.get("error") or "query" not in result:
+            return None
+
+        # Follow the redirects, e.g. to https, so the next requests don't have to
+        final_url = urlparse(res.url)
+        api = API(
+            host=final_url.netloc,
+            scheme=final_url.scheme,
+            path=final_url.path[:final_url.path.rfind("/") + 1],
+            do_init=False,
+            **self._api_options()
+        )
+        api.load_site_query(result["query"])
+
+        return api
+
+    # noinspection PyProtectedMember
+    def _find_edit_uri(self, url: URL) -> URL | None:
+        """
+        Looks for the `EditURI` link of the landing page, reading only its headers
+        and the `<head>` section
+        :param url: URL pointing to the MediaWiki site
+        :return: URL of the directory with the `api.php` script or None if not found
+        """
+
+        res = self._open(url)
+
+        # Maybe the site doesn't support https redirects? Let's try doing that manually
+        if (res is None or not res.ok) and url.scheme == "http":
+            res = self._open(url._replace(scheme="https"))
+
+        if res is None:
+            return None
+
+        with res:
+            content_type = res.headers.get("content-type")
+            if not res.ok or "text/html" not in (content_type or ""):
+                return None
+
+            href = (res.links.get("EditURI") or {}).get("url")
+            if not href:
+                href = self._read_edit_uri(res)
+
+            if not href:
+                return None
+
+            api_url = urlparse(urljoin(res.url, href))
+
+        if not api_url.path.endswith("/api.php"):
+            return None
+
+        return api_url._replace(path=api_url.path[:-len("api.php")], params="", query="",
+                                fragment="")
+
+    def _open(self, url: URL) -> requests.Response | None:
+        """
+        Requests the landing page without downloading its body
+        :param url: URL pointing to the MediaWiki site
+        :return: Response with the unread body or None if the site is not reachable
+        """
+
+        try:
+            return self._session.get(url.geturl(), stream=True)
+        except requests.RequestException as error:
+            logger.debug("Unable to open %s: %s", url.geturl(), error)
+            return None
+
+    @staticmethod
+    def _read_edit_uri(res: requests.Response) -> str | None:
+        """
+        Reads the page until the end of its `<head>`, or at most `HTML_HEAD_MAX_BYTES`,
+        and takes the address from the `EditURI` link
+        :param res: Response with the unread body
+        :return: Address of the API description or None if the page doesn't link to it
+        """
+
+        head = b""
+        try:
+            for chunk in res.iter_content(HTML_CHUNK_SIZE):
+                head += chunk
+                if len(head) >= HTML_HEAD_MAX_BYTES or HTML_HEAD_END_REGEX.search(head):
+                    break
+        except requests.RequestException as error:
+            logger.debug("Unable to read %s: %s", res.url, error)
+
+        link = MEDIA_WIKI_EDIT_URI_REGEX.search(head[:HTML_HEAD_MAX_BYTES])
+        href = link and HTML_HREF_REGEX.search(link.group(0))
+        if not href:
+            return None
+
+        return href.group(1).decode("utf-8", "replace").replace("&amp;", "&")
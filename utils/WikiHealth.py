@@ -0,0 +1,121 @@
+""" Contains class for tracking how reliably a wiki responds """
+from __future__ import annotations
+
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque
+
+from data import SEARCH_TIMEOUT, HEALTH_WINDOW, HEALTH_MIN_SAMPLES, HEALTH_MAX_ERROR_RATE, \
+    HEALTH_QUARANTINE, HEALTH_MAX_QUARANTINE, HEALTH_DEADLINE_FACTOR, HEALTH_MIN_DEADLINE
+from utils.Timing import Timing
+
+
+class WikiHealth:
+    """
+    Keeps recent latencies and failures of a wiki. A wiki failing too often gets quarantined
+    (the circuit opens) and is not searched until a background probe succeeds,
+    the time between the probes doubles with every failed one
+    """
+
+    _latencies: Timing
+    # Results of the recent searches, True if the search failed
+    _failures: Deque[bool]
+    _quarantine: float
+    _quarantined_until: float | None
+    _probing: bool
+    _lock: Lock
+
+    def __init__(self) -> None:
+        self._latencies = Timing(HEALTH_WINDOW)
+        self._failures = deque(maxlen=HEALTH_WINDOW)
+        self._quarantine = HEALTH_QUARANTINE
+        self._quarantined_until = None
+        self._probing = False
+        self._lock = Lock()
+
+    @property
+    def quarantined(self) -> bool:
+        """
+        Returns whether the wiki should be left out of the searches
+        :return: True if the circuit is open
+        """
+
+        return self._quarantined_until is not None
+
+    @property
+    def deadline(self) -> float:
+        """
+        Returns how long to wait for the wiki, based on its own recent latency
+        :return: Deadline (in seconds), never longer than the global search timeout
+        """
+
+        with self._lock:
+            if len(self._latencies.samples) < HEALTH_MIN_SAMPLES:
+                return SEARCH_TIMEOUT
+
+            deadline = self._latencies.percentile(95) * HEALTH_DEADLINE_FACTOR
+
+        return min(SEARCH_TIMEOUT, max(HEALTH_MIN_DEADLINE, deadline))
+
+    def record_success(self, latency: float) -> None:
+        """
+        Records a successful search
+        :param latency: Duration of the search (in seconds)
+        """
+
+        with self._lock:
+            self._latencies.add(latency, False)
+            self._failures.append(False)
+
+    def record_latency(self, latency: float) -> None:
+        """
+        Records latency of a search that completed after it timed out
+        :param latency: Duration of the search (in seconds)
+        """
+
+        with self._lock:
+            self._latencies.add(latency, True)
+
+    def record_failure(self) -> None:
+        """ Records a failed or timed out search, quarantines the wiki if it fails too often """
+
+        with self._lock:
+            self._failures.append(True)
+
+            if self._quarantined_until is None and len(self._failures) >= HEALTH_MIN_SAMPLES and \
+                    sum(self._failures) / len(self._failures) >= HEALTH_MAX_ERROR_RATE:
+                self._quarantine = HEALTH_QUARANTINE
+                self._quarantined_until = time.monotonic() + self._quarantine
+
+    def start_probe(self) -> bool:
+        """
+        Claims the probe of the quarantined wiki once the quarantine expires
+        :return: True if the caller should probe the wiki
+        """
+
+        with self._lock:
+            if self._probing or self._quarantined_until is None or \
+                    time.monotonic() < self._quarantined_until:
+                return False
+
+            self._probing = True
+            return True
+
+    def finish_probe(self, success: bool) -> None:
+        """
+        Releases the wiki from the quarantine, or extends the quarantine
+        :param success: Whether the wiki responded to the probe
+        """
+
+        with self._lock:
+            self._probing = False
+
+            if success:
+                # Give the wiki a fresh start, the old failures would quarantine it again
+                self._failures.clear()
+                self._quarantined_until = None
+                return
+
+            self._quarantine = min(HEALTH_MAX_QUARANTINE, self._quarantine * 2)
+            self._quarantined_until = time.monotonic() + self._quarantine
@@ -0,0 +1,230 @@
+""" Contains class for keeping track of the configured wikis and their API endpoints """
+from __future__ import annotations
+
+import logging
+from concurrent.futures import Future
+from functools import partial
+from threading import Condition
+from typing import Callable, Dict, List
+# noinspection PyPep8Naming
+from urllib.parse import ParseResult as URL
+
+# noinspection PyPep8Naming
+from utils.API import API
+from utils.EndpointResolver import EndpointResolver
+
+logger = logging.getLogger(__name__)
+
+
+class WikiRegistry:
+    """
+    Keeps the configured wikis in the configuration order. Wikis known from the previous
+    configuration or the endpoint cache are ready right away, the rest is discovered
+    in the background and added to the searched wikis once resolved
+    """
+
+    _resolver: EndpointResolver
+    # Notified each time the searched wikis change
+    _condition: Condition
+    # Network locations of the configured wikis in the configuration order,
+    # their resolved API endpoints and the endpoints that are still being discovered
+    _wiki_urls: List[str]
+    _resolved: Dict[str, API]
+    _discoveries: Dict[str, Future]
+    # Network locations of the wikis whose pages are kept when several wikis have the same page
+    _preferred: List[str]
+    # Called when a wiki is resolved in the background
+    _on_change: Callable[[], None]
+
+    def __init__(self, resolver: EndpointResolver, on_change: Callable[[], None]) -> None:
+        """
+        :param resolver: Resolves the API endpoints of the wikis
+        :param on_change: Called when a wiki is resolved in the background
+        """
+
+        self._resolver = resolver
+        self._condition = Condition()
+        self._wiki_urls = []
+        self._resolved = {}
+        self._discoveries = {}
+        self._preferred = []
+        self._on_change = on_change
+
+    @property
+    def apis(self) -> Dict[str, API]:
+        """
+        Returns the resolved wikis by their host, in the configuration order with the preferred
+        wikis first. The order is used to rank equally scored pages and to choose which of
+        the duplicate pages is kept
+        :return: Wikis to search
+        """
+
+        with self._condition:
+            preferred = {netloc: index for index, netloc in enumerate(self._preferred)}
+            apis: Dict[str, API] = {}
+            for netloc in sorted(self._wiki_urls,
+                                 key=lambda value: preferred.get(value, len(preferred))):
+                endpoint = self._resolved.get(netloc)
+                if endpoint:
+                    apis[endpoint.host] = endpoint
+
+        return apis
+
+    @property
+    def resolved(self) -> Dict[str, API]:
+        """
+        Returns the resolved wikis by the network location they are configured with
+        :return: Resolved wikis
+        """
+
+        with self._condition:
+            return dict(self._resolved)
+
+    @property
+    def discovering(self) -> bool:
+        """
+        Returns whether some wikis are still being discovered
+        :return: True if the discovery of any wiki is in progress
+        """
+
+        return bool(self._discoveries)
+
+    def configure(self, urls: List[URL]) -> List[str]:
+        """
+        Replaces the configured wikis, the unknown ones are discovered in the background
+        :param urls: URLs pointing to the MediaWiki sites
+        :return: Hosts of the wikis that were removed
+        """
+
+        resolved: Dict[str, API] = {}
+        unknown: Dict[str, URL] = {}
+        expired: List[URL] = []
+
+        for url in urls:
+            if url.netloc in resolved or url.netloc in unknown:
+                continue
+
+            logger.debug("Resolving API endpoint for %s", url.netloc)
+            endpoint: API | None = self._resolved.get(url.netloc)
+
+            # Wikis kept from the previous configuration are not discovered again
+            if endpoint:
+                resolved[url.netloc] = endpoint
+                logger.debug("API endpoint found in cache: hostname=%s scheme=%s, path=%s",
+                             endpoint.host, endpoint.scheme, endpoint.path)
+                continue
+
+            endpoint, stale = self._resolver.cached(url.netloc)
+            if endpoint:
+                resolved[url.netloc] = endpoint
+                logger.debug("API endpoint found on disk: hostname=%s scheme=%s, path=%s",
+                             endpoint.host, endpoint.scheme, endpoint.path)
+                if stale:
+                    expired.append(url)
+                continue
+
+            unknown[url.netloc] = url
+
+        # Resolve all unknown endpoints at once, without delaying the startup
+        discoveries = {netloc: self._resolver.lookup(url) for netloc, url in unknown.items()}
+
+        with self._condition:
+            previous = [endpoint.host for endpoint in self._resolved.values()]
+            self._wiki_urls = [url.netloc for url in urls]
+            self._resolved = resolved
+            self._discoveries = discoveries
+            self._condition.notify_all()
+
+        logger.info("Parsing completed, resolved %s/%s URLs, discovering %s in the background",
+                    len(resolved), len(urls), len(unknown))
+
+        for netloc, discovery in discoveries.items():
+            discovery.add_done_callback(partial(self._on_discovered, unknown[netloc]))
+
+        # Refresh outdated endpoints without delaying the startup
+        for url in expired:
+            self._resolver.lookup(url).add_done_callback(partial(self._on_revalidated, url))
+
+        hosts = {endpoint.host for endpoint in resolved.values()}
+        return [host for host in previous if host not in hosts]
+
+    def prefer(self, urls: List[URL]) -> None:
+        """
+        Sets the wikis whose pages are preferred over the same pages of other wikis
+        :param urls: URLs pointing to the preferred MediaWiki sites
+        """
+
+        with self._condition:
+            self._preferred = [url.netloc for url in urls]
+            self._condition.notify_all()
+
+    def wait(self, timeout: float | None = None, first: bool = False) -> bool:
+        """
+        Waits until the wikis discovered in the background are resolved
+        :param timeout: (optional) Maximum time (in seconds) to wait
+        :param first: (optional) Whether to wait only until any wiki can be searched
+        :return: True if the wikis are ready, False if the timeout expired
+        """
+
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._discoveries or (first and bool(self._resolved)), timeout
+            )
+
+    def _on_discovered(self, url: URL, discovery: Future) -> None:
+        """
+        Adds the wiki discovered in the background to the searched ones
+        :param url: URL pointing to the MediaWiki site
+        :param discovery: Completed discovery
+        """
+
+        try:
+            endpoint = discovery.result()
+        except Exception as error:  # pylint: disable=broad-except
+            endpoint = None
+            logger.debug("Error while resolving API endpoint for %s: %s", url.netloc, error)
+
+        with self._condition:
+            # The wiki urls were changed while the endpoint was being discovered
+            if self._discoveries.get(url.netloc) is not discovery:
+                return
+
+            del self._discoveries[url.netloc]
+            if endpoint:
+                self._resolved[url.netloc] = endpoint
+            self._condition.notify_all()
+
+        if not endpoint:
+            logger.warning("Unable to resolve API endpoint for %s", url.netloc)
+            return
+
+        logger.debug("Resolved API endpoint: hostname=%s scheme=%s, path=%s",
+                     endpoint.host, endpoint.scheme, endpoint.path)
+        self._on_change()
+
+    def _on_revalidated(self, url: URL, lookup: Future) -> None:
+        """
+        Replaces the cached API endpoint with the one resolved again
+        :param url: URL pointing to the MediaWiki site
+        :param lookup: Completed lookup of the endpoint
+        """
+
+        try:
+            endpoint = lookup.result()
+        except Exception as error:  # pylint: disable=broad-except
+            logger.debug("Error while revalidating API endpoint for %s: %s", url.netloc, error)
+            return
+
+        if not endpoint:
+            logger.warning("Unable to revalidate API endpoint for %s, keeping the cached one",
+                           url.netloc)
+            return
+
+        with self._condition:
+            if url.netloc in self._resolved:
+                self._resolved[url.netloc] = endpoint
+                self._condition.notify_all()
+
+        self._on_change()
+        logger.debug("Revalidated API endpoint: hostname=%s scheme=%s, path=%s",
+                     endpoint.host, endpoint.scheme, endpoint.path)
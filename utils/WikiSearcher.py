@@ -0,0 +1,731 @@
+""" Contains class for searching the configured wikis at once and ranking their pages """
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import Counter
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from threading import Thread
+from typing import cast, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from data import SEARCH_MAX_WORKERS, SEARCH_LIMIT, PREFIX_SEARCH_MAX_LENGTH, WARMUP_IDLE_TIME, \
+    PAGE_FIELDS, RESPONSE_MAX_BYTES, FORMATTING_CATEGORIES, SEARCH_QUEUE_POLL_INTERVAL
+from data.WikiPage import WikiPage
+# noinspection PyPep8Naming
+from utils.API import API, ResponseTooLargeError
+from utils.FetchPlanner import FetchPlanner
+from utils.Metrics import metrics
+from utils.PageDeduplicator import PageDeduplicator
+from utils.PageProcessor import PageProcessor
+from utils.SortedList import SortedList
+from utils.TitleIndexes import TitleIndexes
+from utils.WikiHealth import WikiHealth
+
+logger = logging.getLogger(__name__)
+
+
+class WikiSearcher:
+    """
+    Searches the wikis at once and ranks their pages together. Each wiki is asked for a number
+    of pages planned by its share of the recent results and gets a deadline based on its own
+    latency, wikis that keep failing are quarantined instead of being waited for
+    """
+
+    _executor: ThreadPoolExecutor
+    # Preferences of the extension, updated in place when the user changes them
+    _preferences: Dict[str, Any]
+    _planner: FetchPlanner
+    _health: Dict[str, WikiHealth]
+    _processors: Dict[str, PageProcessor]
+    _title_indexes: TitleIndexes
+    # Searches in progress by the cache key, joined instead of being started again
+    _flights: Dict[Tuple, Future]
+
+    def __init__(self, preferences: Dict[str, Any]) -> None:
+        """
+        :param preferences: Preferences of the extension, read on every search
+        """
+
+        self._executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS,
+                                            thread_name_prefix="wiki-search")
+        self._preferences = preferences
+        self._planner = FetchPlanner()
+        self._health = {}
+        self._processors = {}
+        self._title_indexes = TitleIndexes()
+        self._flights = {}
+
+    @property
+    def title_indexes(self) -> TitleIndexes:
+        """
+        Returns the local title indexes, searched instead of the wikis they are enabled for
+        :return: Title indexes
+        """
+
+        return self._title_indexes
+
+    def searching(self, key: Tuple) -> bool:
+        """
+        Returns whether the search for the cache key is in progress
+        :param key: Cache key of the query
+        :return: True if the wikis are being searched for the query
+        """
+
+        return key in self._flights
+
+    def forget(self, hosts: List[str]) -> None:
+        """
+        Drops everything kept for the wikis removed from the configuration
+        :param hosts: Hosts of the removed wikis
+        """
+
+        for host in hosts:
+            self._processors.pop(host, None)
+            self._health.pop(host, None)
+
+        self._planner.forget(hosts)
+
+    def create_list(self, query: str) -> SortedList[WikiPage]:
+        """
+        Creates an empty list for the results of the query
+        :param query: Text to search
+        :return: Empty list of results
+        """
+
+        return SortedList[WikiPage](query, min_score=self._preferences["min_score"],
+                                    limit=self._preferences["result_limit"])
+
+    def rank(self, query: str, candidates: List[WikiPage]) -> SortedList[WikiPage]:
+        """
+        Ranks the candidates against the query, duplicate pages of the later wikis
+        are dropped before they are scored
+        :param query: Text that was searched
+        :param candidates: Pages found, in the order of the wikis
+        :return: Best pages
+        """
+
+        duplicates = self._preferences["duplicates"]
+        if duplicates != "keep":
+            deduplicator = PageDeduplicator(match_titles=duplicates == "titles")
+            candidates = deduplicator.unique(candidates)
+            if deduplicator.duplicates:
+                metrics.count("duplicates")
+
+        pages = self.create_list(query)
+        pages.extend(candidates)
+
+        return pages
+
+    # pylint: disable=too-many-arguments
+    def search(self, key: Tuple, query: str, wikis: Dict[str, API],
+               on_update: Optional[Callable[[SortedList[WikiPage], int], None]] = None,
+               cancelled: Optional[Future] = None) -> \
+            Tuple[SortedList[WikiPage], List[WikiPage], bool]:
+        """
+        Searches all wikis for the query, or waits for the same search that is already running,
+        so repeated events don't send the same requests twice
+        :param key: Cache key of the query
+        :param query: Text to search
+        :param wikis: Configured wikis by their host, in the order of the wikis
+        :param on_update: (optional) Called with the results gathered so far and the number
+        of wikis that are still loading, only if this search sends the requests
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :return: Combined results, all pages found by the wikis
+        and whether all wikis responded successfully
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        created: Future = Future()
+        flight = self._flights.setdefault(key, created)
+
+        if flight is not created:
+            metrics.count("coalesced")
+            wait([flight, *filter(None, [cancelled])], return_when=FIRST_COMPLETED)
+            if not flight.done():
+                raise CancelledError()
+            return flight.result()
+
+        try:
+            result = self._fetch(query, wikis, on_update, cancelled)
+        except BaseException as error:
+            flight.set_exception(error)
+            raise
+        else:
+            flight.set_result(result)
+        finally:
+            del self._flights[key]
+
+        return result
+
+    def warm(self, query: str, wikis: Dict[str, API], idle_time: Callable[[], float]) -> \
+            Tuple[List[WikiPage] | None, int]:
+        """
+        Searches the wikis for the query in the background. Wikis are searched one by one
+        in the calling thread, so the searches of the user keep the worker threads
+        and nearly all connections
+        :param query: Text to search
+        :param wikis: Configured wikis by their host, in the order of the wikis
+        :param idle_time: Returns the time (in seconds) since the last search of the user
+        :return: All pages found by the wikis, or None if a wiki was left out,
+        and the number of wikis that were searched
+        """
+
+        results: Dict[str, List[WikiPage]] = {}
+        searchable = self._searchable_wikis(wikis)
+        plan = self._planner.plan([wiki.host for wiki in searchable],
+                                  self._preferences["result_limit"])
+        for wiki in [wiki for wiki in searchable if plan[wiki.host]]:
+            # Give up as soon as the user starts typing, partial results are not stored anyway
+            if idle_time() < WARMUP_IDLE_TIME:
+                return None, len(results)
+
+            try:
+                results[wiki.host], _ = self._search_wiki(
+                    wiki, query, deadline=time.monotonic() + self._health_of(wiki).deadline,
+                    limit=plan[wiki.host]
+                )
+            except Exception as error:  # pylint: disable=broad-except
+                logger.debug("Warm-up search failed for %s: %s", wiki.host, error)
+                return None, len(results) + 1
+
+        if len(searchable) != len(wikis):
+            return None, len(results)
+
+        return self._collect_results(results, wikis), len(results)
+
+    def _fetch(self, query: str, wikis: Dict[str, API],
+               on_update: Optional[Callable[[SortedList[WikiPage], int], None]] = None,
+               cancelled: Optional[Future] = None) -> \
+            Tuple[SortedList[WikiPage], List[WikiPage], bool]:
+        """
+        Searches all wikis for the query. Each wiki is asked for a number of pages planned
+        by its share of the recent results, and for more pages only if its last page
+        still made it to the results
+        :param query: Text to search
+        :param wikis: Configured wikis by their host, in the order of the wikis
+        :param on_update: (optional) Called with the results gathered so far and the number
+        of wikis that are still loading, each time a wiki responds before the search completes
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :return: Combined results, all pages found by the wikis
+        and whether all wikis responded successfully
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        limit = self._preferences["result_limit"]
+        searchable = self._searchable_wikis(wikis)
+        plan = self._planner.plan([wiki.host for wiki in searchable], limit)
+        # Wikis left out by the plan are not worth the budget for now, not failed
+        searchable = [wiki for wiki in searchable if plan[wiki.host]]
+
+        results, more, complete = self._search_wikis(
+            query, {wiki: (plan[wiki.host], 0) for wiki in searchable}, on_update, cancelled
+        )
+        complete = complete and len(plan) == len(wikis)
+        candidates = self._collect_results(results, wikis)
+        pages = self.rank(query, candidates)
+
+        # A wiki whose every page made it to the results likely has more pages worth showing
+        shown = Counter(page.host for page in pages)
+        top_ups = {wiki: (limit, plan[wiki.host]) for wiki in searchable
+                   if more.get(wiki.host) and shown[wiki.host] == len(results[wiki.host])}
+
+        if top_ups:
+            if on_update:
+                on_update(pages, len(top_ups))
+
+            complete = self._top_up(query, top_ups, results, cancelled) and complete
+            candidates = self._collect_results(results, wikis)
+            pages = self.rank(query, candidates)
+
+        self._planner.record(plan, pages)
+        return pages, candidates, complete
+
+    def _top_up(self, query: str, plan: Dict[API, Tuple[int, int]],
+                results: Dict[str, List[WikiPage]], cancelled: Optional[Future] = None) -> bool:
+        """
+        Asks the wikis for their next pages and adds them to the pages found before
+        :param query: Text to search
+        :param plan: Number of pages to request and the number of pages to skip, by the wiki
+        :param results: Pages found, grouped by the wiki host, updated in place
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :return: Whether all wikis responded successfully
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        extra, _, complete = self._search_wikis(query, plan, None, cancelled)
+
+        for host, pages in extra.items():
+            metrics.count("top_ups", host)
+            # Pages may shift between the requests, don't list the same page twice
+            known = {page.id for page in results[host]}
+            results[host] = results[host] + [page for page in pages if page.id not in known]
+
+        return complete
+
+    def _search_wikis(self, query: str, plan: Dict[API, Tuple[int, int]],
+                      on_update: Optional[Callable[[SortedList[WikiPage], int], None]] = None,
+                      cancelled: Optional[Future] = None) -> \
+            Tuple[Dict[str, List[WikiPage]], Dict[str, bool], bool]:
+        """
+        Searches the wikis at once, so the total time is bound by the slowest one
+        :param query: Text to search
+        :param plan: Number of pages to request and the number of pages to skip, by the wiki,
+        in the order of the wikis
+        :param on_update: (optional) Called with the results gathered so far and the number
+        of wikis that are still loading, each time a wiki responds before the search completes
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :return: Pages found and whether the wiki may have more pages, both grouped
+        by the wiki host, and whether all wikis responded successfully
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        results: Dict[str, List[WikiPage]] = {}
+        more: Dict[str, bool] = {}
+        complete = True
+
+        # Each wiki gets a deadline based on its own latency, a slow wiki doesn't hold the rest.
+        # The deadline starts with the search itself, not while it waits for a worker thread
+        deadlines: Dict[API, float] = {}
+        futures = {self._executor.submit(self._start_search, wiki, query, deadlines, cancelled,
+                                         *plan[wiki]): wiki
+                   for wiki in plan}
+        pending = set(futures)
+
+        while pending:
+            for future in [future for future in pending
+                           if deadlines.get(futures[future], math.inf) <= time.monotonic()]:
+                wiki = futures[future]
+                pending.discard(future)
+                complete = False
+                if future.cancel():
+                    # The search didn't start, so it says nothing about the health of the wiki
+                    continue
+                self._health_of(wiki).record_failure()
+                logger.warning("Search timed out for %s", wiki.host)
+                metrics.count("timeouts", wiki.host)
+
+            if not pending:
+                break
+
+            done, _ = wait(
+                [*pending, *filter(None, [cancelled])],
+                timeout=self._wait_time([futures[future] for future in pending], deadlines),
+                return_when=FIRST_COMPLETED
+            )
+
+            if cancelled and cancelled.done():
+                # Free the worker threads for the newer search, requests that were already
+                # sent can't be aborted, but their results will be ignored
+                for future in futures:
+                    future.cancel()
+                raise CancelledError()
+
+            for future in done:
+                wiki = futures[future]
+                pending.discard(future)
+                try:
+                    results[wiki.host], more[wiki.host] = future.result()
+                except CancelledError:
+                    raise
+                except Exception as error:  # pylint: disable=broad-except
+                    results[wiki.host] = []
+                    complete = False
+                    logger.warning("Search failed for %s: %s", wiki.host, error)
+
+            if pending and done and on_update:
+                on_update(self.rank(
+                    query, self._collect_results(results, [wiki.host for wiki in plan])
+                ), len(pending))
+
+        return results, more, complete
+
+    # pylint: disable=too-many-arguments
+    def _start_search(self, wiki: API, query: str, deadlines: Dict[API, float],
+                      cancelled: Optional[Future], limit: int, offset: int) -> \
+            Tuple[List[WikiPage], bool]:
+        """
+        Sets the deadline of the wiki and searches it, runs once a worker thread is free
+        :param wiki: Wiki to search
+        :param query: Text to search
+        :param deadlines: Deadlines of the started searches, updated in place
+        :param cancelled: Future that cancels the search when resolved
+        :param limit: Number of pages to request
+        :param offset: Number of pages to skip
+        :return: List of pages found on the wiki and whether the wiki may have more pages
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        deadlines[wiki] = time.monotonic() + self._health_of(wiki).deadline
+        return self._search_wiki(wiki, query, cancelled, deadlines[wiki], limit, offset)
+
+    @staticmethod
+    def _wait_time(wikis: List[API], deadlines: Dict[API, float]) -> float:
+        """
+        Returns how long to wait for the searches before checking their deadlines again
+        :param wikis: Wikis that are still being searched
+        :param deadlines: Deadlines of the started searches
+        :return: Time (in seconds) until the nearest deadline, or until the next check
+        of the searches waiting for a worker thread, which get their deadlines once they start
+        """
+
+        deadline = min(deadlines.get(wiki, math.inf) for wiki in wikis)
+        if any(wiki not in deadlines for wiki in wikis):
+            deadline = min(deadline, time.monotonic() + SEARCH_QUEUE_POLL_INTERVAL)
+
+        return max(0.0, deadline - time.monotonic())
+
+    def _searchable_wikis(self, wikis: Dict[str, API]) -> List[API]:
+        """
+        Returns the configured wikis that are not quarantined,
+        quarantined wikis are probed in the background instead of being waited for
+        :param wikis: Configured wikis by their host
+        :return: Wikis to search
+        """
+
+        searchable = []
+        for wiki in wikis.values():
+            if self._health_of(wiki).quarantined:
+                metrics.count("quarantined", wiki.host)
+                self._probe(wiki)
+                continue
+            searchable.append(wiki)
+
+        return searchable
+
+    def _health_of(self, wiki: API) -> WikiHealth:
+        """
+        Returns the health of the wiki, kept across replacements of the API object
+        :param wiki: Wiki to return the health of
+        :return: Health of the wiki
+        """
+
+        health = self._health.get(wiki.host)
+        if not health:
+            health = self._health.setdefault(wiki.host, WikiHealth())
+
+        return health
+
+    def _probe(self, wiki: API) -> None:
+        """
+        Checks in the background whether a quarantined wiki responds again,
+        once its quarantine expires
+        :param wiki: Quarantined wiki
+        """
+
+        health = self._health_of(wiki)
+        if not health.start_probe():
+            return
+
+        def probe():
+            try:
+                wiki.get(action="query", meta=["siteinfo"], siprop=["general"],
+                         retry_on_error=False)
+            except Exception as error:  # pylint: disable=broad-except
+                logger.debug("Wiki %s is still unavailable: %s", wiki.host, error)
+                health.finish_probe(False)
+                return
+
+            logger.info("Wiki %s is available again", wiki.host)
+            health.finish_probe(True)
+
+        # Don't hold the search thread pool, the wiki is likely to time out
+        Thread(target=probe, daemon=True).start()
+
+    @staticmethod
+    def _collect_results(results: Dict[str, List[WikiPage]], hosts: Iterable[str]) -> \
+            List[WikiPage]:
+        """
+        Combines results of the individual wikis into a single list of candidates
+        :param results: Pages found, grouped by the wiki host
+        :param hosts: Hosts of the wikis, in the order of the wikis
+        :return: All pages found, in the order of the wikis
+        """
+
+        # Merge in the order of the wikis to keep the ranking of equally scored pages stable,
+        # no matter in which order the wikis responded
+        return [page for host in hosts if host in results for page in results[host]]
+
+    def _search_title_index(self, wiki: API, query: str, limit: int) -> \
+            List[Dict[str, Any]] | None:
+        """
+        Searches the local title index of the wiki
+        :param wiki: Wiki to search
+        :param query: Text to search
+        :param limit: Number of pages the wiki would be asked for
+        :return: Pages in the same format as returned by the API,
+        or None if the index is not enabled or doesn't have enough pages
+        """
+
+        index = self._title_indexes.get(wiki)
+        if not index or not index.ready:
+            return None
+
+        matches = index.search(query, max(limit, SEARCH_LIMIT) * 5)
+        if len(matches) < limit:
+            return None
+
+        # The index doesn't contain categories and language links,
+        # only the main page can be filtered out with the improved filters
+        return [{
+            "pageid": page_id,
+            "ns": namespace,
+            "title": title,
+            "displaytitle": title,
+            "fullurl": wiki.page_url(title)
+        } for page_id, namespace, title in matches]
+
+    def _page_query(self, **kwargs) -> Dict[str, Any]:
+        r"""
+        Builds parameters of a query for pages with all props used by the search
+        :param kwargs: \*\*kwargs: Generator options, or titles of the pages
+        :return: Query parameters
+        """
+
+        props = ["info"]
+        options: Dict[str, Any] = {}
+
+        # Categories and language links are only used by the improved filters
+        if self._preferences["improved_filters"]:
+            props += ["categories", "langlinks"]
+            options.update(
+                # Categories Options
+                clcategories=FORMATTING_CATEGORIES,
+                cllimit=500,
+                # Language Links Options
+                lllang="en",
+                lllimit=500
+            )
+
+        return {
+            "prop": props,
+            **options,
+            # Info Options
+            "inprop": ["displaytitle", "url"],
+            # Generator Options
+            **kwargs
+        }
+
+    @staticmethod
+    def _result_pages(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Extracts pages from the response of a query for pages
+        :param result: Response of the API
+        :return: Pages, in the order of the generator if it's provided
+        """
+
+        if "query" not in result or not result["query"] or "pages" not in result["query"] or \
+                not result["query"]["pages"]:
+            return []
+
+        raw_pages = list(cast(dict, result["query"]["pages"]).values())
+
+        # Pages are keyed by their ids, restore the order of the generator if it's provided
+        return sorted(raw_pages, key=lambda raw_page: raw_page.get("index", 0))
+
+    def _query_pages(self, wiki: API, **kwargs) -> List[Dict[str, Any]]:
+        r"""
+        Queries the wiki for pages listed by the generator
+        :param wiki: Wiki to query
+        :param kwargs: \*\*kwargs: Generator options, or titles of the pages
+        :return: Pages returned by the API
+        """
+
+        # Requests are never retried, a slow wiki is dropped from the results instead
+        return self._result_pages(wiki.query_pages(PAGE_FIELDS, RESPONSE_MAX_BYTES,
+                                                   **self._page_query(**kwargs)))
+
+    # pylint: disable=too-many-arguments
+    def _search_remote(self, wiki: API, query: str, namespace_ids: List[int], limit: int,
+                       offset: int, cancelled: Optional[Future] = None) -> List[Dict[str, Any]]:
+        """
+        Searches the wiki using the configured search strategy
+        :param wiki: Wiki to search
+        :param query: Text to search
+        :param namespace_ids: Ids of the namespaces to search in
+        :param limit: Number of pages to request
+        :param offset: Number of pages to skip
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :return: Pages returned by the API
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        strategy = self._preferences["search_strategy"]
+
+        if strategy == "prefix" or \
+                (strategy == "auto" and len(query.strip()) <= PREFIX_SEARCH_MAX_LENGTH):
+            return self._search_prefix(wiki, query, namespace_ids, limit, offset, cancelled)
+
+        return self._query_pages(
+            wiki,
+            generator="search",
+            gsrsearch=query,
+            gsrnamespace=namespace_ids,
+            gsrlimit=limit,
+            **({"gsroffset": offset} if offset else {})
+        )
+
+    # pylint: disable=too-many-arguments
+    def _search_prefix(self, wiki: API, query: str, namespace_ids: List[int], limit: int,
+                       offset: int, cancelled: Optional[Future] = None) -> List[Dict[str, Any]]:
+        """
+        Searches titles of the wiki by the prefix, falling back to the full-text search
+        if there are not enough titles with the prefix. Both searches are sent in one request,
+        the full-text search lists only the ids and titles of the pages
+        :param wiki: Wiki to search
+        :param query: Text to search
+        :param namespace_ids: Ids of the namespaces to search in
+        :param limit: Number of pages to request
+        :param offset: Number of pages to skip
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :return: Pages returned by the API
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        prefix, fallback = wiki.batch_query(
+            self._page_query(
+                generator="prefixsearch",
+                gpssearch=query,
+                gpsnamespace=namespace_ids,
+                gpslimit=limit,
+                **({"gpsoffset": offset} if offset else {})
+            ),
+            {
+                "list": "search",
+                "srsearch": query,
+                "srnamespace": namespace_ids,
+                "srlimit": limit,
+                **({"sroffset": offset} if offset else {}),
+                "srprop": "",
+                "srinfo": ""
+            },
+            fields=PAGE_FIELDS,
+            max_bytes=RESPONSE_MAX_BYTES
+        )
+
+        raw_pages = self._result_pages(prefix)
+        if len(raw_pages) >= limit:
+            return raw_pages
+
+        found = {raw_page["pageid"] for raw_page in raw_pages}
+        hits = [hit for hit in (fallback.get("query") or {}).get("search", [])
+                if hit["pageid"] not in found]
+
+        if not hits:
+            return raw_pages
+
+        if not self._preferences["improved_filters"]:
+            # Same as the title index, the display title and URL are derived from the title
+            return raw_pages + [{
+                "pageid": hit["pageid"],
+                "ns": hit["ns"],
+                "title": hit["title"],
+                "displaytitle": hit["title"],
+                "fullurl": wiki.page_url(hit["title"])
+            } for hit in hits]
+
+        if cancelled and cancelled.done():
+            raise CancelledError()
+
+        # The improved filters need categories and language links, which a list can't return
+        fetched = {raw_page["pageid"]: raw_page for raw_page in self._query_pages(
+            wiki, pageids=[hit["pageid"] for hit in hits]
+        )}
+
+        return raw_pages + [fetched[hit["pageid"]] for hit in hits if hit["pageid"] in fetched]
+
+    # pylint: disable=too-many-arguments
+    def _search_sized(self, wiki: API, query: str, namespace_ids: List[int], limit: int,
+                      offset: int, cancelled: Optional[Future] = None) -> List[Dict[str, Any]]:
+        """
+        Searches the wiki, asking for fewer pages while the response exceeds the size limit.
+        A too large response says nothing about the health of the wiki
+        :param wiki: Wiki to search
+        :param query: Text to search
+        :param namespace_ids: Ids of the namespaces to search in
+        :param limit: Number of pages to request
+        :param offset: Number of pages to skip
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :return: Pages returned by the API, fewer than the limit if they had to be shrunk
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        while True:
+            try:
+                return self._search_remote(wiki, query, namespace_ids, limit, offset, cancelled)
+            except ResponseTooLargeError as error:
+                if limit <= 1:
+                    logger.warning("Skipping results of %s: %s", wiki.host, error)
+                    return []
+
+                if cancelled and cancelled.done():
+                    raise CancelledError() from error
+
+                limit //= 2
+                logger.debug("Retrying search of %s for %d pages: %s", wiki.host, limit, error)
+
+    # pylint: disable=too-many-arguments
+    def _search_wiki(self, wiki: API, query: str, cancelled: Optional[Future] = None,
+                     deadline: float | None = None, limit: int = SEARCH_LIMIT,
+                     offset: int = 0) -> Tuple[List[WikiPage], bool]:
+        """
+        Searches a single wiki for the query
+        :param wiki: Wiki to search
+        :param query: Text to search
+        :param cancelled: (optional) Future that cancels the search when resolved
+        :param deadline: (optional) Monotonic time after which the search counts as timed out
+        :param limit: (optional) Number of pages to request
+        :param offset: (optional) Number of pages to skip
+        :return: List of pages found on the wiki and whether the wiki may have more pages
+        :raises CancelledError: If the search was cancelled before it completed
+        """
+
+        with metrics.span("search", wiki.host):
+            processor = self._processor(wiki)
+
+            # The local index is searched whole, there is nothing more to ask the wiki for
+            raw_pages = None if offset else self._search_title_index(wiki, query, limit)
+            more = False
+            if raw_pages is None:
+                health = self._health_of(wiki)
+                start = time.monotonic()
+                try:
+                    raw_pages = self._search_sized(wiki, query, processor.namespace_ids, limit,
+                                                   offset, cancelled)
+                except CancelledError:
+                    raise
+                except Exception:
+                    # A timed out search was already recorded as failed
+                    if deadline is None or time.monotonic() <= deadline:
+                        health.record_failure()
+                    raise
+
+                # A timed out search was already recorded as failed, keep only its latency
+                latency = time.monotonic() - start
+                if deadline is None or time.monotonic() <= deadline:
+                    health.record_success(latency)
+                else:
+                    health.record_latency(latency)
+
+                # Pages shrunk to fit the size limit are not topped up, the offset would skip
+                # the pages that didn't fit
+                more = len(raw_pages) >= limit
+            else:
+                metrics.count("index_hits", wiki.host)
+
+            with metrics.span("processing", wiki.host):
+                return processor.process(raw_pages, self._preferences["improved_filters"],
+                                         self._preferences["improved_titles"]), more
+
+    def _processor(self, wiki: API) -> PageProcessor:
+        """
+        Returns the page processor of the wiki, prepares a new one if the wiki was replaced
+        :param wiki: Wiki to return the processor for
+        :return: Page processor
+        """
+
+        processor = self._processors.get(wiki.host)
+        if not processor or processor.wiki is not wiki:
+            processor = self._processors[wiki.host] = PageProcessor(wiki)
+
+        return processor